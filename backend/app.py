@@ -1,6 +1,12 @@
 from flask import Flask, jsonify
 from config import Config
 from models import db, User  
+from utils.cache import response_cache
+from utils.jobs import report_jobs
+from utils.follow_graph import follow_graph
+from utils.profiling import query_profiler
+from utils.user_cache import user_cache, profile_cache
+from utils.categories import category_registry
 from flask_login import LoginManager
 # from dotenv import load_dotenv  # We are using os.getenv() in config.py to get environment variables
 # load_dotenv()  # (see above comment for why this is commented out) Load environment variables from .env file we make sure .env is loaded before config class is used
@@ -12,6 +18,24 @@ app.config.from_object(Config)
 # Initialize SQLAlchemy, aka connect the app to the DB
 db.init_app(app)
 
+# Response cache for the hot public read endpoints (list_items, categories, item detail, item reviews)
+response_cache.init_app(app)
+
+# Thread pool that runs report jobs in the background (POST /api/reports/jobs)
+report_jobs.init_app(app)
+
+# Session-user cache for Flask-Login's user_loader (see load_user below)
+user_cache.init_app(app)
+
+# Public profile cache behind the batch lookup (/api/users/profiles)
+profile_cache.init_app(app)
+
+# In-process category name -> icon map (item serialization, GET /api/items/categories)
+category_registry.init_app(app)
+
+# Opt-in SQL profiling of the report endpoints (REPORT_PROFILING=1, GET /api/reports/_profile)
+query_profiler.init_app(app)
+
 """ To create tables with SQLAlchemy (aka our app), we can run these commands:
         cd backend
         flask shell
@@ -32,7 +56,8 @@ login_manager.init_app(app)
 
 @login_manager.user_loader
 def load_user(username):
-    return User.query.get(username)
+    # Served from the per-process user cache; only a miss queries the user table
+    return user_cache.load(username)
 
 # Return JSON 401 message instead of redirecting to login page (this lets the frontend handle redirect behavior)
 # If someone tries to use a @login_required API call without a user session, a 401 error will be passed to and 
@@ -60,5 +85,15 @@ app.register_blueprint(reports_bp, url_prefix='/api/reports')
 from routes.follow import follow_bp
 app.register_blueprint(follow_bp, url_prefix='/api/follow')
 
+from routes.admin import admin_bp
+app.register_blueprint(admin_bp, url_prefix='/api/admin')
+
+# Load the follow graph used by the social queries (mutual follows, follower counts)
+follow_graph.init_app(app)
+
+# Maintenance CLI commands (flask rebuild-ratings, ...)
+from commands import register_commands
+register_commands(app)
+
 if __name__ == '__main__':
     app.run(host='::', port=5000, debug=True)
\ No newline at end of file
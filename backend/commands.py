@@ -0,0 +1,77 @@
+import click
+from flask.cli import with_appcontext
+from models import db, Item
+from utils.report_stats import rebuild_report_stats
+from utils.feed import rebuild_timelines
+from utils.recommendations import rebuild_follow_suggestions
+from utils.bulk_import import run_import, BulkImportError, RECORD_TYPES, DEFAULT_BATCH_SIZE
+
+# Maintenance commands, run from the backend folder, e.g.:
+#     flask rebuild-ratings
+# (they are registered on the app in app.py, so `flask --help` lists them)
+
+
+@click.command('rebuild-ratings')
+@with_appcontext
+def rebuild_ratings():
+    """Backfill/repair every item's score_sum, review_count, score histogram and star_rating from the review table."""
+    Item.rebuild_review_aggregates()
+    db.session.commit()
+    click.echo(f'Rebuilt review aggregates for {Item.query.count()} items')
+
+
+@click.command('rebuild-report-stats')
+@with_appcontext
+def rebuild_report_stats_command():
+    """Rebuild the reporting summary tables (user_stats, user_daily_posts) from the raw tables."""
+    rebuild_report_stats()
+    db.session.commit()
+    click.echo('Rebuilt user_stats and user_daily_posts')
+
+
+@click.command('rebuild-feeds')
+@with_appcontext
+def rebuild_feeds():
+    """Rebuild every user's following-feed timeline (timeline_entry) from the follow and item tables."""
+    rebuild_timelines()
+    db.session.commit()
+    click.echo('Rebuilt timeline_entry')
+
+
+@click.command('rebuild-follow-suggestions')
+@click.option('--top-k', type=int, default=None, help='Suggestions stored per user (default: FOLLOW_SUGGESTIONS_TOP_K).')
+@with_appcontext
+def rebuild_follow_suggestions_command(top_k):
+    """Recompute every user's "people you may know" suggestions (run periodically, e.g. nightly from cron)."""
+    report = rebuild_follow_suggestions(top_k=top_k)
+    db.session.commit()
+    click.echo(f"Stored {report['suggestions']} suggestions for {report['users']} users "
+               f"({report['sellers']} sellers, {report['follows']} follows) in {report['elapsed_seconds']}s")
+
+
+@click.command('import-data')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--type', 'record_type', type=click.Choice(RECORD_TYPES), help='Record type of every row (CSV only).')
+@click.option('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, show_default=True, help='Records per transaction.')
+@click.option('--skip-aggregates', is_flag=True, help="Don't rebuild rating aggregates and report summaries afterwards.")
+@with_appcontext
+def import_data(source, fmt, record_type, batch_size, skip_aggregates):
+    """Bulk import users, categories, items, reviews and follows from an NDJSON or CSV file ('-' for stdin)."""
+    try:
+        report = run_import(source, fmt=fmt, record_type=record_type, batch_size=batch_size,
+                            rebuild_aggregates=not skip_aggregates)
+    except BulkImportError as e:
+        raise click.ClickException(str(e))
+    for name, count in report['rows'].items():
+        click.echo(f'{name:>14}: {count}')
+    click.echo(f"Imported {report['total_records']} records in {report['batches']} batches, "
+               f"{report['elapsed_seconds']}s ({report['records_per_second']} records/s)")
+
+
+def register_commands(app):
+    app.cli.add_command(rebuild_ratings)
+    app.cli.add_command(rebuild_report_stats_command)
+    app.cli.add_command(rebuild_feeds)
+    app.cli.add_command(rebuild_follow_suggestions_command)
+    app.cli.add_command(import_data)
@@ -1,4 +1,5 @@
 import datetime
+from sqlalchemy import DDL, event
 from flask_sqlalchemy import SQLAlchemy  # Database management
 from flask_login import UserMixin  # Session management (avoids the need to write is_authenticated, is_active, etc. to handle user sessions)
 
@@ -68,6 +69,14 @@ REVIEW_SCORE_MAP = {
     'Poor': 1.25
 }
 
+# Score -> item column holding how many reviews of that score the item has
+REVIEW_HISTOGRAM_COLUMNS = {
+    'Excellent': 'excellent_count',
+    'Good': 'good_count',
+    'Fair': 'fair_count',
+    'Poor': 'poor_count'
+}
+
 """
 CREATE TABLE `item` (
   `id`           INT NOT NULL AUTO_INCREMENT,
@@ -79,6 +88,14 @@ CREATE TABLE `item` (
   `posted_by`    VARCHAR(64) NOT NULL,
   `star_rating`  FLOAT NOT NULL DEFAULT 0.0,
   `image_url`    VARCHAR(512) DEFAULT NULL,
+  -- Running review aggregates (star_rating = score_sum / review_count), maintained by create_review
+  `score_sum`    FLOAT NOT NULL DEFAULT 0.0,
+  `review_count` INT NOT NULL DEFAULT 0,
+  -- Per-score histogram, also maintained by create_review
+  `excellent_count` INT NOT NULL DEFAULT 0,
+  `good_count`      INT NOT NULL DEFAULT 0,
+  `fair_count`      INT NOT NULL DEFAULT 0,
+  `poor_count`      INT NOT NULL DEFAULT 0,
   CONSTRAINT `pk_item` PRIMARY KEY (`id`),
   CONSTRAINT `fk_item_user` FOREIGN KEY (`posted_by`)
     REFERENCES `user` (`username`)
@@ -86,6 +103,27 @@ CREATE TABLE `item` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE INDEX `ix_item_posted_by` ON `item` (`posted_by`);
+
+-- Keyset pagination indexes for list_items (one per sort key, id breaks ties)
+CREATE INDEX `ix_item_date_posted_id` ON `item` (`date_posted`, `id`);
+CREATE INDEX `ix_item_price_id` ON `item` (`price`, `id`);
+CREATE INDEX `ix_item_star_rating_id` ON `item` (`star_rating`, `id`);
+CREATE INDEX `ix_item_review_count_id` ON `item` (`review_count`, `id`);
+
+-- Per-user, per-day lookups (create_item's daily posting limit) as a range on date_posted instead of DATE(date_posted)
+CREATE INDEX `ix_item_date_posted_posted_by` ON `item` (`date_posted`, `posted_by`);
+
+-- Existing databases: add the running aggregates, then fill them with `flask rebuild-ratings`
+ALTER TABLE `item`
+  ADD COLUMN `score_sum`       FLOAT NOT NULL DEFAULT 0.0,
+  ADD COLUMN `review_count`    INT NOT NULL DEFAULT 0,
+  ADD COLUMN `excellent_count` INT NOT NULL DEFAULT 0,
+  ADD COLUMN `good_count`      INT NOT NULL DEFAULT 0,
+  ADD COLUMN `fair_count`      INT NOT NULL DEFAULT 0,
+  ADD COLUMN `poor_count`      INT NOT NULL DEFAULT 0;
+
+-- Keyword search index (see ITEM_SEARCH_DDL below; MySQL keeps FULLTEXT indexes current on every INSERT/UPDATE)
+CREATE FULLTEXT INDEX `ft_item_title_description` ON `item` (`title`, `description`);
 """
 class Item(db.Model):
     __tablename__ = 'item'
@@ -108,28 +146,145 @@ class Item(db.Model):
     # Item image - can be either user-uploaded URL or default icon from first category
     image_url = db.Column(db.String(512), nullable=True)
 
+    # Running review aggregates so a new review (or a rating lookup) never has to read the item's other reviews
+    score_sum = db.Column(db.Float, nullable=False, default=0.0)  # sum of REVIEW_SCORE_MAP values over all reviews
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Review score histogram (how many Excellent/Good/Fair/Poor reviews), see REVIEW_HISTOGRAM_COLUMNS
+    excellent_count = db.Column(db.Integer, nullable=False, default=0)
+    good_count = db.Column(db.Integer, nullable=False, default=0)
+    fair_count = db.Column(db.Integer, nullable=False, default=0)
+    poor_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Composite indexes that back the keyset (cursor) pagination in list_items, and per-day posting lookups
+    __table_args__ = (
+        db.Index('ix_item_date_posted_id', 'date_posted', 'id'),
+        db.Index('ix_item_price_id', 'price', 'id'),
+        db.Index('ix_item_star_rating_id', 'star_rating', 'id'),
+        db.Index('ix_item_review_count_id', 'review_count', 'id'),
+        db.Index('ix_item_date_posted_posted_by', 'date_posted', 'posted_by'),
+    )
+
     def __repr__(self):
         return f'<Item {self.id} "{self.title}">'
     
     def calculate_star_rating(self):
-        reviews = self.reviews.all()
-        if not reviews:
+        # Average of the running aggregates (no need to load the reviews themselves)
+        if not self.review_count:
             return 0.0
-        total = sum(REVIEW_SCORE_MAP.get(r.score, 0) for r in reviews) # uses our REVIEW_SCORE_MAP to map each score to a number
-        return round(total / len(reviews), 2)  # rounded to 2 decimal places
+        return round(self.score_sum / self.review_count, 2)  # rounded to 2 decimal places
+
+    def review_histogram(self):
+        return {score: getattr(self, column) or 0 for score, column in REVIEW_HISTOGRAM_COLUMNS.items()}
+
+    @classmethod
+    def add_review_score(cls, item_id, score):
+        """
+        Fold one new review into the item's running aggregates with a single atomic UPDATE:
+            UPDATE item
+            SET star_rating = ROUND((score_sum + :value) / (review_count + 1), 2),
+                score_sum = score_sum + :value,
+                review_count = review_count + 1,
+                <score>_count = <score>_count + 1
+            WHERE id = :item_id;
+        star_rating is assigned first because MySQL evaluates SET assignments left to right, so every
+        expression here sees the pre-update values on both MySQL and SQLite.
+        """
+        value = REVIEW_SCORE_MAP.get(score, 0)  # uses our REVIEW_SCORE_MAP to map each score to a number
+        histogram_column = getattr(cls, REVIEW_HISTOGRAM_COLUMNS[score])
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id == item_id)
+            .ordered_values(
+                (cls.star_rating, db.func.round((cls.score_sum + value) / (cls.review_count + 1), 2)),
+                (cls.score_sum, cls.score_sum + value),
+                (cls.review_count, cls.review_count + 1),
+                (histogram_column, histogram_column + 1),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def rebuild_review_aggregates(cls):
+        """
+        Backfill/repair: recompute score_sum, review_count, the histogram and star_rating for every item from the review table.
+            UPDATE item SET
+              score_sum       = COALESCE((SELECT SUM(CASE score WHEN 'Excellent' THEN 5.0 ... END) FROM review WHERE item_id = item.id), 0),
+              review_count    = (SELECT COUNT(*) FROM review WHERE item_id = item.id),
+              excellent_count = (SELECT COUNT(*) FROM review WHERE item_id = item.id AND score = 'Excellent'), ...;
+            UPDATE item SET star_rating = CASE WHEN review_count > 0 THEN ROUND(score_sum / review_count, 2) ELSE 0 END;
+        """
+        score_value = db.case(REVIEW_SCORE_MAP, value=Review.score, else_=0)
+        score_sum = db.select(db.func.coalesce(db.func.sum(score_value), 0)) \
+            .where(Review.item_id == cls.id).scalar_subquery()
+        review_count = db.select(db.func.count(Review.id)).where(Review.item_id == cls.id).scalar_subquery()
+        histogram = {
+            column: db.select(db.func.count(Review.id))
+            .where(Review.item_id == cls.id, Review.score == score).scalar_subquery()
+            for score, column in REVIEW_HISTOGRAM_COLUMNS.items()
+        }
+        db.session.execute(
+            db.update(cls).values(score_sum=score_sum, review_count=review_count, **histogram)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            db.update(cls).values(star_rating=db.case(
+                (cls.review_count > 0, db.func.round(cls.score_sum / cls.review_count, 2)),
+                else_=0.0
+            )).execution_options(synchronize_session=False)
+        )
 
     def get_image_url(self):
         """Get the item's image URL, falling back to default category icon if none set"""
         if self.image_url:
             return self.image_url
         
-        # Get first category's icon as default
-        first_category = self.categories.first()
-        if first_category and first_category.icon_key:
-            return f"https://api.iconify.design/{first_category.icon_key}.svg"
-        
-        # Ultimate fallback to a generic item icon
-        return "https://api.iconify.design/mdi:package-variant.svg"
+        # Get first category's icon as default (icon looked up in the category registry, no join on category)
+        from utils.categories import category_registry  # imported here because utils.categories imports this module
+        first_category = (
+            db.session.query(item_category.c.category_name)
+            .filter(item_category.c.item_id == self.id)
+            .limit(1)
+            .scalar()
+        )
+        return resolve_item_image_url(None, category_registry.icon_for(first_category) if first_category else None)
+
+
+# Keyword search index over item.title/item.description, created right after the item table by db.create_all().
+# MySQL uses a FULLTEXT index. SQLite (used for local testing) uses an FTS5 table that mirrors the item table,
+# and the triggers keep it current as create_item (or anything else) inserts, updates or deletes rows.
+ITEM_SEARCH_DDL = {
+    'mysql': [
+        "CREATE FULLTEXT INDEX ft_item_title_description ON item (title, description)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE item_fts USING fts5(title, description, content='item', content_rowid='id')",
+        """CREATE TRIGGER item_fts_ai AFTER INSERT ON item BEGIN
+             INSERT INTO item_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+           END""",
+        """CREATE TRIGGER item_fts_ad AFTER DELETE ON item BEGIN
+             INSERT INTO item_fts(item_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+           END""",
+        # Only title/description edits touch the index; review aggregate updates (star_rating, counts) skip it
+        """CREATE TRIGGER item_fts_au AFTER UPDATE OF title, description ON item BEGIN
+             INSERT INTO item_fts(item_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+             INSERT INTO item_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+           END""",
+    ],
+}
+for _dialect, _statements in ITEM_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Item.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+
+
+def resolve_item_image_url(image_url, first_icon_key):
+    """Shared image fallback rules: uploaded image -> first category's icon -> generic item icon"""
+    if image_url:
+        return image_url
+    if first_icon_key:
+        return f"https://api.iconify.design/{first_icon_key}.svg"
+    # Ultimate fallback to a generic item icon
+    return "https://api.iconify.design/mdi:package-variant.svg"
     
 
 """
@@ -229,3 +384,213 @@ class Follow(db.Model):
 
 
 
+
+
+# Data-version markers used for HTTP conditional GETs (ETag / Last-Modified, see utils/conditional.py)
+"""
+CREATE TABLE `data_version` (
+  `name`        VARCHAR(64) NOT NULL,          -- scope, e.g. 'items', 'categories', 'reviews'
+  `version`     BIGINT      NOT NULL DEFAULT 0,
+  `updated_at`  DATETIME    NOT NULL,          -- UTC
+  CONSTRAINT `pk_data_version` PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.datetime.utcnow())
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
+
+
+# Reporting summary tables, maintained incrementally by the write paths (see utils/report_stats.py)
+# and rebuilt from scratch with `flask rebuild-report-stats`
+# Their user foreign keys (and timeline_entry's / follow_suggestion's below) are ON UPDATE CASCADE: every user gets a
+# user_stats row at registration, so with RESTRICT no one could change their username (POST /api/users/profile).
+# Existing databases: drop and re-add each such constraint with ON UPDATE CASCADE, e.g.
+#   ALTER TABLE `user_stats` DROP FOREIGN KEY `fk_user_stats_user`,
+#     ADD CONSTRAINT `fk_user_stats_user` FOREIGN KEY (`username`) REFERENCES `user` (`username`)
+#     ON UPDATE CASCADE ON DELETE RESTRICT;
+"""
+CREATE TABLE `user_stats` (
+  `username`              VARCHAR(64) NOT NULL,
+  `items_posted`          INT NOT NULL DEFAULT 0,
+  `reviews_written`       INT NOT NULL DEFAULT 0,
+  `poor_reviews_written`  INT NOT NULL DEFAULT 0,
+  `poor_reviews_received` INT NOT NULL DEFAULT 0,   -- 'Poor' reviews on items this user posted
+  `followers`             INT NOT NULL DEFAULT 0,   -- follow rows with user_username = username
+  `following`             INT NOT NULL DEFAULT 0,   -- follow rows with follower_username = username
+  CONSTRAINT `pk_user_stats` PRIMARY KEY (`username`),
+  CONSTRAINT `fk_user_stats_user` FOREIGN KEY (`username`)
+    REFERENCES `user` (`username`)
+    ON UPDATE CASCADE ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE INDEX `ix_user_stats_items_posted` ON `user_stats` (`items_posted`, `poor_reviews_received`);
+CREATE INDEX `ix_user_stats_reviews_written` ON `user_stats` (`reviews_written`, `poor_reviews_written`);
+
+-- Existing databases:
+--   ALTER TABLE `user_stats` ADD COLUMN `followers` INT NOT NULL DEFAULT 0, ADD COLUMN `following` INT NOT NULL DEFAULT 0;
+--   then run `flask rebuild-report-stats`
+"""
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+
+    username = db.Column(db.String(64), db.ForeignKey('user.username', onupdate='CASCADE'), primary_key=True)
+    items_posted = db.Column(db.Integer, nullable=False, default=0)
+    reviews_written = db.Column(db.Integer, nullable=False, default=0)
+    poor_reviews_written = db.Column(db.Integer, nullable=False, default=0)
+    poor_reviews_received = db.Column(db.Integer, nullable=False, default=0)
+    followers = db.Column(db.Integer, nullable=False, default=0)
+    following = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_user_stats_items_posted', 'items_posted', 'poor_reviews_received'),
+        db.Index('ix_user_stats_reviews_written', 'reviews_written', 'poor_reviews_written'),
+    )
+
+    def __repr__(self):
+        return f'<UserStats {self.username}>'
+
+
+"""
+CREATE TABLE `user_daily_posts` (
+  `username`    VARCHAR(64) NOT NULL,
+  `day`         DATE NOT NULL,
+  `post_count`  INT NOT NULL DEFAULT 0,
+  CONSTRAINT `pk_user_daily_posts` PRIMARY KEY (`username`, `day`),
+  CONSTRAINT `fk_user_daily_posts_user` FOREIGN KEY (`username`)
+    REFERENCES `user` (`username`)
+    ON UPDATE CASCADE ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE INDEX `ix_user_daily_posts_day_count` ON `user_daily_posts` (`day`, `post_count`);
+"""
+class UserDailyPosts(db.Model):
+    __tablename__ = 'user_daily_posts'
+
+    username = db.Column(db.String(64), db.ForeignKey('user.username', onupdate='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    post_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_user_daily_posts_day_count', 'day', 'post_count'),
+    )
+
+    def __repr__(self):
+        return f'<UserDailyPosts {self.username} {self.day}={self.post_count}>'
+
+
+# Per-(user, day) category index for users_two_categories: item_category with the poster and posting day copied in,
+# keyed category first, so "which (user, day) pairs posted an item in category X" is one primary key range scan
+"""
+CREATE TABLE `user_day_category` (
+  `category_name` VARCHAR(64) NOT NULL,
+  `username`      VARCHAR(64) NOT NULL,       -- item.posted_by
+  `day`           DATE NOT NULL,              -- item.date_posted
+  `item_id`       INT NOT NULL,
+  CONSTRAINT `pk_user_day_category` PRIMARY KEY (`category_name`, `username`, `day`, `item_id`),
+  CONSTRAINT `fk_user_day_category_user` FOREIGN KEY (`username`)
+    REFERENCES `user` (`username`)
+    ON UPDATE CASCADE ON DELETE RESTRICT,
+  CONSTRAINT `fk_user_day_category_item` FOREIGN KEY (`item_id`)
+    REFERENCES `item` (`id`)
+    ON UPDATE RESTRICT ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE INDEX `ix_user_day_category_user_day` ON `user_day_category` (`username`, `day`);
+"""
+class UserDayCategory(db.Model):
+    __tablename__ = 'user_day_category'
+
+    category_name = db.Column(db.String(64), primary_key=True)
+    username = db.Column(db.String(64), db.ForeignKey('user.username', onupdate='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+
+    __table_args__ = (
+        db.Index('ix_user_day_category_user_day', 'username', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<UserDayCategory {self.category_name} {self.username} {self.day} item={self.item_id}>'
+
+
+# Following feed timelines (see utils/feed.py): one row per (follower, item posted by someone they follow), written
+# when the item is created (fan-out-on-write), so a feed page is a primary key range scan of the reader's own rows
+"""
+CREATE TABLE `timeline_entry` (
+  `follower_username` VARCHAR(64) NOT NULL,   -- whose feed the row belongs to
+  `item_id`           INT NOT NULL,
+  `posted_by`         VARCHAR(64) NOT NULL,   -- item.posted_by, so unfollowing can drop that seller's rows
+  CONSTRAINT `pk_timeline_entry` PRIMARY KEY (`follower_username`, `item_id`),
+  CONSTRAINT `fk_timeline_entry_follower` FOREIGN KEY (`follower_username`)
+    REFERENCES `user` (`username`)
+    ON UPDATE CASCADE ON DELETE RESTRICT,
+  CONSTRAINT `fk_timeline_entry_item` FOREIGN KEY (`item_id`)
+    REFERENCES `item` (`id`)
+    ON UPDATE RESTRICT ON DELETE RESTRICT,
+  CONSTRAINT `fk_timeline_entry_posted_by` FOREIGN KEY (`posted_by`)
+    REFERENCES `user` (`username`)
+    ON UPDATE CASCADE ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE INDEX `ix_timeline_entry_follower_posted_by` ON `timeline_entry` (`follower_username`, `posted_by`);
+CREATE INDEX `ix_timeline_entry_posted_by` ON `timeline_entry` (`posted_by`);
+"""
+class TimelineEntry(db.Model):
+    __tablename__ = 'timeline_entry'
+
+    follower_username = db.Column(db.String(64), db.ForeignKey('user.username', onupdate='CASCADE'), primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    posted_by = db.Column(db.String(64), db.ForeignKey('user.username', onupdate='CASCADE'), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_timeline_entry_follower_posted_by', 'follower_username', 'posted_by'),
+        db.Index('ix_timeline_entry_posted_by', 'posted_by'),
+    )
+
+    def __repr__(self):
+        return f'<TimelineEntry {self.follower_username} item={self.item_id}>'
+
+
+# "People you may know" (see utils/recommendations.py): each user's top-K sellers to follow, written by a batch job
+# (`flask rebuild-follow-suggestions`), so GET /api/follow/suggestions is a primary key range read
+"""
+CREATE TABLE `follow_suggestion` (
+  `username`           VARCHAR(64) NOT NULL,   -- who the suggestion is for
+  `rank`               INT NOT NULL,           -- 1 = best
+  `suggested_username` VARCHAR(64) NOT NULL,
+  `score`              FLOAT NOT NULL,         -- mutual_follows + category weight * category_score
+  `mutual_follows`     INT NOT NULL,           -- people username follows who follow suggested_username
+  `category_score`     FLOAT NOT NULL,         -- 0..1 cosine similarity of category profiles
+  CONSTRAINT `pk_follow_suggestion` PRIMARY KEY (`username`, `rank`),
+  CONSTRAINT `fk_follow_suggestion_user` FOREIGN KEY (`username`)
+    REFERENCES `user` (`username`)
+    ON UPDATE CASCADE ON DELETE RESTRICT,
+  CONSTRAINT `fk_follow_suggestion_suggested` FOREIGN KEY (`suggested_username`)
+    REFERENCES `user` (`username`)
+    ON UPDATE CASCADE ON DELETE RESTRICT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE INDEX `ix_follow_suggestion_suggested` ON `follow_suggestion` (`suggested_username`);
+"""
+class FollowSuggestion(db.Model):
+    __tablename__ = 'follow_suggestion'
+
+    username = db.Column(db.String(64), db.ForeignKey('user.username', onupdate='CASCADE'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    suggested_username = db.Column(db.String(64), db.ForeignKey('user.username', onupdate='CASCADE'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    mutual_follows = db.Column(db.Integer, nullable=False)
+    category_score = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_follow_suggestion_suggested', 'suggested_username'),
+    )
+
+    def __repr__(self):
+        return f'<FollowSuggestion {self.username} #{self.rank} {self.suggested_username}>'
@@ -0,0 +1,70 @@
+import io
+from flask import Blueprint, jsonify, request, current_app
+from utils.admin import admin_required
+from utils.cache import response_cache
+from utils.jobs import report_jobs
+from utils.user_cache import user_cache, profile_cache
+from utils.bulk_import import run_import, BulkImportError, DEFAULT_BATCH_SIZE
+
+admin_bp = Blueprint('admin', __name__)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # BULK_IMPORT_MAX_BYTES
+
+@admin_bp.route('/cache_stats', methods=['GET'])
+@admin_required
+def cache_stats():
+    """
+    Hit/miss counters for this worker's response cache, so we can check it is absorbing front-page traffic,
+    the same for its session-user cache (Flask-Login's user_loader) and public profile cache, and how many report
+    jobs it has queued/running/finished
+
+    Method: GET /api/admin/cache_stats
+    Security: Requires an administrator (@admin_required, see ADMIN_USERNAMES)
+    """
+    return jsonify({
+        'response_cache': response_cache.stats(),
+        'user_cache': user_cache.stats(),
+        'profile_cache': profile_cache.stats(),
+        'report_jobs': report_jobs.stats()
+    }), 200
+
+
+@admin_bp.route('/import', methods=['POST'])
+@admin_required
+def bulk_import():
+    """
+    Stream an NDJSON or CSV file into the database in batched transactions (same pipeline as `flask import-data`)
+
+    Method: POST /api/admin/import?format=ndjson|csv&type=<record type, CSV only>&batch_size=<n>
+    Body: multipart upload (field name: file), or the raw file as the request body; at most BULK_IMPORT_MAX_BYTES.
+          The import runs inside this request, so anything bigger (million-row datasets) goes through
+          `flask import-data` on the server instead, which has no request or proxy timeout to beat.
+    Returns: per-table row counts, batch count, elapsed time and records/second
+             (411 without a Content-Length, 413 when the body is over the limit; nothing is imported either way)
+    Security: Requires an administrator (@admin_required, see ADMIN_USERNAMES)
+    """
+    # Checked before reading anything: batches are committed as they go, so a body cut off half way would
+    # leave a partial import behind
+    max_bytes = current_app.config.get('BULK_IMPORT_MAX_BYTES', DEFAULT_MAX_BYTES)
+    if request.content_length is None:
+        return jsonify({'error': 'Content-Length is required'}), 411
+    if request.content_length > max_bytes:
+        return jsonify({'error': f'Upload is larger than {max_bytes} bytes; use `flask import-data` for big files',
+                        'max_bytes': max_bytes}), 413
+
+    fmt = request.args.get('format', 'ndjson').strip().lower()
+    record_type = request.args.get('type') or None
+    try:
+        batch_size = max(1, int(request.args.get('batch_size', DEFAULT_BATCH_SIZE)))
+    except ValueError:
+        return jsonify({'error': 'batch_size must be an integer'}), 400
+
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    lines = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+    try:
+        report = run_import(lines, fmt=fmt, record_type=record_type, batch_size=batch_size)
+    except BulkImportError as e:
+        return jsonify({'error': str(e), 'line': e.line}), 400
+    return jsonify(report), 200
@@ -3,6 +3,7 @@ from models import db, User
 import bcrypt
 from sqlalchemy.exc import IntegrityError
 from flask_login import login_user, logout_user, login_required, current_user  # Session management functions
+from utils.report_stats import ensure_user_stats
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -50,6 +51,8 @@ def register():
     )
     db.session.add(user)
     try:
+        db.session.flush()
+        ensure_user_stats(username)  # reporting summary row (user_stats)
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
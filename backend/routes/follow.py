@@ -1,26 +1,100 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
-from models import db, User, Follow
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Follow, FollowSuggestion, DataVersion
+from utils.pagination import CursorError, parse_limit, name_page
+from utils.serializers import serialize_items
+from utils.conditional import bump_version, conditional_get, FOLLOWS, SUGGESTIONS
+from utils.follow_graph import follow_graph
+from utils.feed import feed_page, on_follow, on_unfollow
+from utils.report_stats import record_follows, follow_counts
 
 follow_bp = Blueprint('follow', __name__, url_prefix='/api/follow')
 
+# Most usernames accepted by one bulk follow / unfollow request
+MAX_BULK_FOLLOW = 100
+
+FOLLOW_CONFLICT = 'Another request changed these follows at the same time; please try again.'
+
+"""
+-- Validation for single and bulk follow/unfollow: which of :usernames exist, and which we already follow (one query)
+SELECT u.username, f.follower_username
+FROM user u
+LEFT JOIN follow f ON f.user_username = u.username AND f.follower_username = :current_username
+WHERE u.username IN (:usernames);
+"""
+def _follow_status(usernames):
+    """{username: already followed by current_user?} for those of usernames that exist"""
+    rows = (
+        db.session.query(User.username, Follow.follower_username)
+        .outerjoin(Follow, (Follow.user_username == User.username)
+                   & (Follow.follower_username == current_user.username))
+        .filter(User.username.in_(usernames))
+        .all()
+    )
+    return {username: follower is not None for username, follower in rows}
+
+
+def _follow(usernames):
+    """
+    Follow every user in usernames (exist, not followed yet, not current_user) in one multi-row INSERT.
+    Returns False, having changed nothing, if a concurrent request of ours followed one of them after we checked.
+    """
+    try:
+        db.session.execute(Follow.__table__.insert(), [
+            {'user_username': username, 'follower_username': current_user.username} for username in usernames
+        ])
+        on_follow(current_user.username, usernames)  # backfill their items into our feed
+        record_follows(current_user.username, usernames)
+        bump_version(FOLLOWS)
+        db.session.commit()
+    except IntegrityError:  # duplicate follow primary key
+        db.session.rollback()
+        return False
+    follow_graph.add(current_user.username, *usernames)
+    return True
+
+
+def _unfollow(usernames):
+    """Unfollow every user in usernames (all currently followed) in one DELETE"""
+    db.session.execute(Follow.__table__.delete().where(
+        Follow.follower_username == current_user.username, Follow.user_username.in_(usernames)
+    ))
+    on_unfollow(current_user.username, usernames)
+    record_follows(current_user.username, usernames, delta=-1)
+    bump_version(FOLLOWS)
+    db.session.commit()
+    follow_graph.remove(current_user.username, *usernames)
+
+
+def _bulk_usernames():
+    """The de-duplicated "usernames" list from the JSON body, or (None, error response)"""
+    data = request.get_json(silent=True) or {}
+    usernames = data.get('usernames')
+    if not isinstance(usernames, list) or not all(isinstance(name, str) for name in usernames):
+        return None, (jsonify({'error': 'usernames must be a list of usernames'}), 400)
+    usernames = list(dict.fromkeys(name.strip() for name in usernames if name.strip()))
+    if not usernames:
+        return None, (jsonify({'error': 'usernames must not be empty'}), 400)
+    if len(usernames) > MAX_BULK_FOLLOW:
+        return None, (jsonify({'error': f'At most {MAX_BULK_FOLLOW} usernames per request'}), 400)
+    return usernames, None
+
+
 @follow_bp.route('/<username>', methods=['POST'])
 @login_required
 def follow_user(username):
     if username == current_user.username:
         return jsonify({'error': 'You cannot follow yourself.'}), 400
 
-    user_to_follow = User.query.filter_by(username=username).first()
-    if not user_to_follow:
+    status = _follow_status([username])
+    if username not in status:
         return jsonify({'error': 'User not found.'}), 404
-
-    existing_follow = Follow.query.filter_by(user_username=username, follower_username=current_user.username).first()
-    if existing_follow:
+    if status[username]:
         return jsonify({'error': 'You are already following this user.'}), 400
 
-    new_follow = Follow(user_username=username, follower_username=current_user.username)
-    db.session.add(new_follow)
-    db.session.commit()
+    if not _follow([username]):
+        return jsonify({'error': FOLLOW_CONFLICT}), 409
 
     return jsonify({'message': f'You are now following {username}.'}), 200
   
@@ -30,33 +104,114 @@ def unfollow_user(username):
     if username == current_user.username:
         return jsonify({'error': 'You cannot unfollow yourself.'}), 400
 
-    user_to_unfollow = User.query.filter_by(username=username).first()
-    if not user_to_unfollow:
+    status = _follow_status([username])
+    if username not in status:
         return jsonify({'error': 'User not found.'}), 404
-
-    follow = Follow.query.filter_by(user_username=username, follower_username=current_user.username).first()
-    if not follow:
+    if not status[username]:
         return jsonify({'error': 'You are not following this user.'}), 400
 
-    db.session.delete(follow)
-    db.session.commit()
+    _unfollow([username])
 
     return jsonify({'message': f'You have unfollowed {username}.'}), 200
 
+@follow_bp.route('/bulk/follow', methods=['POST'])
+@login_required
+def bulk_follow():
+    """
+    Follow many users at once. Body: {"usernames": ["alice", "bob", ...]} (at most MAX_BULK_FOLLOW)
+    One query validates every name, one INSERT writes all the new follow rows.
+
+    Method: POST /api/follow/bulk/follow
+
+    Returns: JSON object {'followed': [...], 'already_following': [...], 'not_found': [...], 'rejected': [...]}
+             (rejected: yourself), or 409 (nothing followed) if a concurrent request followed one of them first
+    Security: Requires user authentication (@login_required)
+    """
+    usernames, error = _bulk_usernames()
+    if error:
+        return error
+    rejected = [name for name in usernames if name == current_user.username]
+    status = _follow_status([name for name in usernames if name != current_user.username])
+    followed = [name for name in usernames if status.get(name) is False]
+    if followed and not _follow(followed):
+        return jsonify({'error': FOLLOW_CONFLICT}), 409
+    return jsonify({
+        'followed': followed,
+        'already_following': [name for name in usernames if status.get(name) is True],
+        'not_found': [name for name in usernames if name not in status and name not in rejected],
+        'rejected': rejected
+    }), 200
+
+@follow_bp.route('/bulk/unfollow', methods=['POST'])
+@login_required
+def bulk_unfollow():
+    """
+    Unfollow many users at once. Body: {"usernames": ["alice", "bob", ...]} (at most MAX_BULK_FOLLOW)
+    One query validates every name, one DELETE removes all the follow rows.
+
+    Method: POST /api/follow/bulk/unfollow
+
+    Returns: JSON object {'unfollowed': [...], 'not_following': [...], 'not_found': [...]}
+    Security: Requires user authentication (@login_required)
+    """
+    usernames, error = _bulk_usernames()
+    if error:
+        return error
+    status = _follow_status(usernames)
+    unfollowed = [name for name in usernames if status.get(name) is True]
+    if unfollowed:
+        _unfollow(unfollowed)
+    return jsonify({
+        'unfollowed': unfollowed,
+        'not_following': [name for name in usernames if status.get(name) is False],
+        'not_found': [name for name in usernames if name not in status]
+    }), 200
+
+"""
+-- Keyset pagination (followers shown; following uses follower_username = :current_username, ordered by user_username)
+SELECT follower_username
+FROM follow
+WHERE user_username = :current_username
+  AND follower_username > :last_username      -- omitted on the first page
+ORDER BY follower_username
+LIMIT :limit_plus_one;
+
+SELECT followers, following FROM user_stats WHERE username = :current_username;   -- total, first page only
+"""
+def _follow_list(column, key_column, cursor_key, count_name):
+    """
+    Legacy full list, or one keyset page if ?limit= or ?cursor= is given. The total comes from the maintained
+    user_stats counts instead of COUNT(*) over the follow table.
+    """
+    query = db.session.query(column).filter(key_column == current_user.username).order_by(column)
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return jsonify([{'username': u} for (u,) in query.all()]), 200
+
+    cursor = request.args.get('cursor')
+    try:
+        rows, next_cursor, limit, _ = name_page(query, column, cursor_key, request.args.get('limit'), cursor,
+                                                count_total=False)
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'users': [{'username': u} for (u,) in rows],
+        'next_cursor': next_cursor,
+        'limit': limit,
+        'total': None if cursor else follow_counts(current_user.username)[count_name]
+    }), 200
+
 @follow_bp.route('/followers', methods=['GET'])
 @login_required
 def get_followers():
-    followers = Follow.query.filter_by(user_username=current_user.username).all()
-    follower_usernames = [f.follower_username for f in followers]
-    return jsonify([{'username': u} for u in follower_usernames]), 200
+    # Optional: ?limit=<page size>&cursor=<next_cursor> for {'users', 'next_cursor', 'limit', 'total'}
+    return _follow_list(Follow.follower_username, Follow.user_username, 'followers', 'followers')
 
 
 @follow_bp.route('/following', methods=['GET'])
 @login_required
 def get_following():
-    following = Follow.query.filter_by(follower_username=current_user.username).all()
-    following_usernames = [f.user_username for f in following]
-    return jsonify([{'username': u} for u in following_usernames]), 200
+    # Optional: ?limit=<page size>&cursor=<next_cursor> for {'users', 'next_cursor', 'limit', 'total'}
+    return _follow_list(Follow.user_username, Follow.follower_username, 'following', 'following')
 
 @follow_bp.route('/remove_follower/<username>', methods=['DELETE'])
 @login_required
@@ -74,6 +229,85 @@ def remove_follower(username):
         return jsonify({'error': 'This user is not following you.'}), 400
     
     db.session.delete(follow)
+    on_unfollow(username, [current_user.username])
+    record_follows(username, [current_user.username], delta=-1)
+    bump_version(FOLLOWS)
     db.session.commit()
+    follow_graph.remove(username, current_user.username)
     
-    return jsonify({'message': f'You have removed {username} from your followers.'}), 200
\ No newline at end of file
+    return jsonify({'message': f'You have removed {username} from your followers.'}), 200
+
+@follow_bp.route('/counts/<username>', methods=['GET'])
+@login_required
+def get_follow_counts(username):
+    if db.session.get(User, username) is None:
+        return jsonify({'error': 'User not found.'}), 404
+    # Follower / following counts maintained in user_stats (no COUNT(*) over the follow table)
+    return jsonify({'username': username, **follow_counts(username)}), 200
+
+@follow_bp.route('/feed', methods=['GET'])
+@login_required
+def get_feed():
+    """
+    Items posted by the users you follow, newest first (see utils/feed.py)
+    Query params (optional): limit=<page size> (default 24, max 100), cursor=<next_cursor from the previous page>
+
+    Method: GET /api/follow/feed
+
+    Returns: JSON object {'items': [...], 'next_cursor': <string or null>, 'limit'}
+    Security: Requires user authentication (@login_required)
+    """
+    try:
+        items, next_cursor, limit = feed_page(current_user.username, request.args.get('limit'), request.args.get('cursor'))
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'items': serialize_items(items), 'next_cursor': next_cursor, 'limit': limit}), 200
+
+"""
+SELECT suggested_username, score, mutual_follows, category_score
+FROM follow_suggestion
+WHERE username = :current_username
+ORDER BY `rank`;
+"""
+@follow_bp.route('/suggestions', methods=['GET'])
+@login_required
+@conditional_get(SUGGESTIONS, FOLLOWS)
+def get_follow_suggestions():
+    """
+    "People you may know": sellers to follow, ranked by friends-of-friends and category overlap. The scores are
+    precomputed by `flask rebuild-follow-suggestions` (see utils/recommendations.py); this only reads them.
+    Query params (optional): limit=<how many> (default 10, at most FOLLOW_SUGGESTIONS_TOP_K)
+
+    Method: GET /api/follow/suggestions
+
+    Returns: JSON object {'suggestions': [{username, score, mutual_follows, category_score}, ...],
+             'computed_at': <when the batch job last ran, or null>}
+    Security: Requires user authentication (@login_required)
+    """
+    try:
+        limit = parse_limit(request.args.get('limit'), default=10,
+                            maximum=current_app.config.get('FOLLOW_SUGGESTIONS_TOP_K', 20))
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+
+    rows = (
+        db.session.query(FollowSuggestion.suggested_username, FollowSuggestion.score,
+                         FollowSuggestion.mutual_follows, FollowSuggestion.category_score)
+        .filter(FollowSuggestion.username == current_user.username)
+        .order_by(FollowSuggestion.rank)
+        .all()
+    )
+    # Skip anyone followed since the batch job ran
+    follow_graph.ensure_current()
+    following = follow_graph.following(current_user.username)
+    suggestions = [
+        {'username': name, 'score': score, 'mutual_follows': mutual, 'category_score': category}
+        for name, score, mutual, category in rows
+        if name not in following
+    ][:limit]
+
+    computed_at = db.session.query(DataVersion.updated_at).filter(DataVersion.name == SUGGESTIONS).scalar()
+    return jsonify({
+        'suggestions': suggestions,
+        'computed_at': computed_at.isoformat() + 'Z' if computed_at else None
+    }), 200
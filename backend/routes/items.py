@@ -1,9 +1,19 @@
 from flask import Blueprint, request, jsonify
-from models import db, Item, Category, Review, item_category
+from models import db, Item, item_category
 from flask_login import login_required, current_user
 from datetime import datetime, date
+import math
+from decimal import Decimal, InvalidOperation
 from sqlalchemy import func
 from utils.imgur import upload_to_imgur
+from utils.cache import response_cache
+from utils.categories import category_registry
+from utils.report_stats import record_item_posted, record_item_categories
+from utils.feed import fan_out_item
+from utils.conditional import conditional_get, bump_version, ITEMS, CATEGORIES, PRICES
+from utils.serializers import serialize_item, serialize_items
+from utils.search import keyword_search_query, category_filter
+from utils.pagination import CursorError, parse_limit, encode_cursor, decode_cursor, keyset_filter
 
 items_bp = Blueprint('items', __name__)
 
@@ -37,8 +47,8 @@ def create_item():
   
   today = date.today()
   count = Item.query.filter( # queries the Item table to count how many items have been posted today
-    Item.posted_by == current_user.username,
-    func.date(Item.date_posted) == today
+    Item.date_posted == today,  # date_posted is a DATE column, so compare it directly (DATE() around it defeats the index)
+    Item.posted_by == current_user.username
   ).count()
   
   if count >=2:
@@ -57,105 +67,127 @@ def create_item():
   # Add item to the current session before doing any category <-> item relationship stuff
   db.session.add(new_item)
 
-  # attach categories to items
-  for cat_name in categories:
-    cat_name = cat_name.strip().lower()
-    if not cat_name:
-      continue
-    category = Category.query.get(cat_name) # checks if the category exists in DB so that if it doesn't exist it can be created
-    if not category:
-      category = Category(name=cat_name)
-      db.session.add(category)
-    new_item.categories.append(category) # links the category to the item
+  # Resolve all of the item's categories at once from the category registry; any that don't exist yet
+  # are created together with a single bulk upsert
+  cat_names = sorted({c.strip().lower() for c in categories if isinstance(c, str) and c.strip()})
+  category_registry.ensure(cat_names)
+
+  # attach categories to items (one multi-row INSERT into item_category)
+  db.session.flush()  # assigns new_item.id
+  if cat_names:
+    db.session.execute(item_category.insert(), [{'item_id': new_item.id, 'category_name': name} for name in cat_names])
 
   # add new items to database
 #   db.session.add(new_item)
+  # reporting summaries (user_stats, user_daily_posts, user_day_category)
+  record_item_posted(current_user.username, new_item.date_posted)
+  record_item_categories(new_item.id, current_user.username, new_item.date_posted, cat_names)
+  # followers' feeds (fan-out-on-write, skipped for sellers with very many followers)
+  fan_out_item(new_item)
+  bump_version(ITEMS, CATEGORIES, PRICES)
   db.session.commit()
+  response_cache.invalidate('items', 'categories')  # new listing entry, and possibly new categories
   
   # Return the created item with its computed image URL
-  item_data = {
-    'id': new_item.id,
-    'title': new_item.title,
-    'description': new_item.description,
-    'price': str(new_item.price),
-    'posted_by': new_item.posted_by,
-    'date_posted': new_item.date_posted.isoformat(),
-    'categories': [{'name': c.name, 'icon_key': c.icon_key} for c in new_item.categories],
-    'star_rating': new_item.star_rating,
-    'review_count': new_item.reviews.count(),
-    'image_url': new_item.get_image_url()
-  }
+  item_data = serialize_item(new_item)
   
   return jsonify({'message': 'Item created successfully', 'item': item_data}), 201
 
 """
+-- Keyset (cursor) pagination, shown here for sort=price&order=desc. The first page omits the WHERE clause.
 SELECT
   id, title, description, price, posted_by, date_posted,
   star_rating, image_url
 FROM item
-ORDER BY date_posted DESC;
+WHERE price < :last_price OR (price = :last_price AND id < :last_id)
+ORDER BY price DESC, id DESC
+LIMIT :limit_plus_one;
 """
+# Sort keys accepted by list_items: ?sort=<key> -> (column to order by, cursor value parser)
+# Every sort also orders by item.id so rows with the same sort value have a stable order between pages
+def _finite(parse):
+  """
+  parse for a numeric cursor value, raising ValueError for anything but a finite number (Decimal raises
+  InvalidOperation, an ArithmeticError, for 'abc'; NaN / Infinity would otherwise reach the SQL comparison)
+  """
+  def parse_finite(value):
+    try:
+      number = parse(value)
+    except InvalidOperation:
+      raise ValueError('Invalid cursor')
+    if not math.isfinite(number):
+      raise ValueError('Invalid cursor')
+    return number
+  return parse_finite
+
+LIST_SORTS = {
+  'date': (Item.date_posted, date.fromisoformat),
+  'price': (Item.price, _finite(Decimal)),
+  'star_rating': (Item.star_rating, _finite(float)),
+  'review_count': (Item.review_count, int),
+}
+
 @items_bp.route('/list_items', methods=['GET'])
 # No @login_required for items shown on the front page
+@conditional_get(ITEMS)
+@response_cache.cached(lambda: ['items'])
 def list_items():
+  """
+  Query params (all optional):
+    sort=date|price|star_rating|review_count  (default: date)
+    order=desc|asc                            (default: desc)
+    limit=<page size>                         (default 24, max 100)
+    cursor=<next_cursor from the previous page>
+
+  If neither limit nor cursor is given the full list is returned as a plain JSON array (the original behavior).
+  Otherwise returns {'items': [...], 'next_cursor': <string or null>, 'sort', 'order', 'limit'}.
+  """
+  sort_key = request.args.get('sort', 'date').strip().lower()
+  order = request.args.get('order', 'desc').strip().lower()
+  if sort_key not in LIST_SORTS:
+    return jsonify({'error': f"sort must be one of: {', '.join(LIST_SORTS)}"}), 400
+  if order not in ('asc', 'desc'):
+    return jsonify({'error': 'order must be asc or desc'}), 400
+  descending = order == 'desc'
+  paginate = 'limit' in request.args or 'cursor' in request.args
+
+  sort_column, parse_sort_value = LIST_SORTS[sort_key]
+  key_columns = (sort_column, Item.id)
+  query = Item.query.order_by(*(c.desc() if descending else c.asc() for c in key_columns))
+
+  limit = None
+  if paginate:
+    try:
+      limit = parse_limit(request.args.get('limit'))
+      cursor = request.args.get('cursor')
+      if cursor:
+        last_value, last_id = decode_cursor(cursor, f'{sort_key}:{order}')
+        query = query.filter(keyset_filter(key_columns, (parse_sort_value(last_value), int(last_id)), descending))
+    except (CursorError, TypeError, ValueError) as e:
+      return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+    # Fetch one extra row so we know whether there is another page without running a COUNT(*)
+    query = query.limit(limit + 1)
+
   # Fetch items (ordered)
-  items = Item.query.order_by(Item.date_posted.desc()).all()
+  items = query.all()
+
+  next_cursor = None
+  if paginate and len(items) > limit:
+    items = items[:limit]
+    last = items[-1]
+    last_value = getattr(last, sort_column.key)
+    next_cursor = encode_cursor(f'{sort_key}:{order}', (last_value, last.id))
+
   if not items:
+    if paginate:
+      return jsonify({'items': [], 'next_cursor': None, 'sort': sort_key, 'order': order, 'limit': limit}), 200
     return jsonify([]), 200
   
-  item_ids = [item.id for item in items]
-
-  # Batch fetch categories for all items
-  cat_rows = (
-    db.session.query(
-      item_category.c.item_id,
-      Category.name,
-      Category.icon_key
-    )
-    .join(Category, Category.name == item_category.c.category_name)
-    .filter(item_category.c.item_id.in_(item_ids))
-    .all()
-  )
-  categories_map = {}
-  for item_id, name, icon_key in cat_rows:
-    categories_map.setdefault(item_id, []).append({'name': name, 'icon_key': icon_key})
-  
-  # Batch fetch review counts per item
-  review_rows = (
-    db.session.query(Review.item_id, func.count(Review.id))
-    .filter(Review.item_id.in_(item_ids))
-    .group_by(Review.item_id)
-    .all()
-  )
-  review_count_map = {item_id: cnt for item_id, cnt in review_rows}
-
-  # Build results without per-item queries
-  result = []
-  for item in items:
-    cats = categories_map.get(item.id, [])
-    # Compute reviewed image URL without triggering a categories query
-    if item.image_url:
-      resolved_image_url = item.image_url
-    else:
-      icon_key = cats[0]['icon_key'] if cats else None
-      resolved_image_url = (
-        f"https://api.iconify.design/{icon_key}.svg"
-        if icon_key else "https://api.iconify.design/mdi:package-variant.svg"
-      )
-    
-    result.append({
-      'id': item.id,
-      'title': item.title,
-      'description': item.description,
-      'price': str(item.price),
-      'posted_by': item.posted_by,
-      'date_posted': item.date_posted.isoformat(),
-      'categories': cats,
-      'star_rating': item.star_rating,
-      'review_count': review_count_map.get(item.id, 0),
-      'image_url': resolved_image_url
-    })
+  # Only the items on this page need their categories looked up
+  result = serialize_items(items)
 
+  if paginate:
+    return jsonify({'items': result, 'next_cursor': next_cursor, 'sort': sort_key, 'order': order, 'limit': limit}), 200
   return jsonify(result), 200
 
 """
@@ -167,21 +199,12 @@ WHERE id = :item_id
 LIMIT 1;
 """
 @items_bp.route('/<int:item_id>', methods=['GET'])
+@conditional_get(ITEMS)
+@response_cache.cached(lambda item_id: [f'item:{item_id}'])
 def get_item(item_id):
   """ Return detailed information for a single item """
   item = Item.query.get_or_404(item_id)
-  data = {
-      'id': item.id,
-      'title': item.title,
-      'description': item.description,
-      'price': str(item.price),
-      'posted_by': item.posted_by,
-      'date_posted': item.date_posted.isoformat(),
-      'categories': [{'name': c.name, 'icon_key': c.icon_key} for c in item.categories],
-      'star_rating': item.star_rating,
-      'review_count': item.reviews.count(),
-      'image_url': item.get_image_url()
-  }
+  data = serialize_item(item)
   return jsonify(data), 200
 
 """
@@ -191,56 +214,50 @@ SELECT
 FROM item AS i
 JOIN item_category AS ic
   ON ic.item_id = i.id
-JOIN category AS c
-  ON c.name = ic.category_name
-WHERE c.name = :category_name      -- you already lower() the param; utf8mb4_unicode_ci is case-insensitive
+WHERE ic.category_name = :category_name      -- you already lower() the param; utf8mb4_unicode_ci is case-insensitive
 ORDER BY i.date_posted DESC;
+
+-- ?q= keyword mode: see utils/search.py (MATCH ... AGAINST on the FULLTEXT index)
 """
 @items_bp.route('/search', methods=['GET'])
 #@login_required remove it so unlogged users can search
+@conditional_get(ITEMS)
 def search_items():
     """
     PHASE 2 REQUIREMENT: Search Interface Implementation
     
-    Purpose: Search for items by category name
+    Purpose: Search for items by category name, or by keywords in the title/description
     Method: GET /api/items/search?category=<category_name>
+            GET /api/items/search?q=<keywords>[&category=<name>,<name>...][&page=<n>][&limit=<n>]
     
-    Returns: JSON array of items that match the category
+    Returns: JSON array of items that match the category (keyword mode: best matches first, one page at a time)
     Security: Requires user authentication (@login_required)
     
     Example Usage: GET /api/items/search?category=electronics
+                   GET /api/items/search?q=wireless+headphones&category=electronics
     """
+    q = request.args.get('q', '').strip()
+    if q:
+        return keyword_search(q)
+
     # Get the category parameter from query string
     category_name = request.args.get('category', '').strip().lower()
     
     # Validate input - category is required
     if not category_name:
         return jsonify({
-            'error': 'Category parameter is required',
-            'usage': 'GET /api/items/search?category=<category_name>'
+            'error': 'Category or q parameter is required',
+            'usage': 'GET /api/items/search?category=<category_name> or GET /api/items/search?q=<keywords>'
         }), 400
     
     # Query database for items that have the specified category
-    # Uses SQLAlchemy join to find items connected to categories
-    items = Item.query.join(Item.categories).filter(
-        Category.name == category_name
+    # Joins item_category directly (the category table itself isn't needed to match on its name)
+    items = Item.query.join(item_category, item_category.c.item_id == Item.id).filter(
+        item_category.c.category_name == category_name
     ).order_by(Item.date_posted.desc()).all()
     
-    # Format results for frontend consumption
-    result = []
-    for item in items:
-        result.append({
-            'id': item.id,
-            'title': item.title,
-            'description': item.description,
-            'price': str(item.price),
-            'posted_by': item.posted_by,
-            'date_posted': item.date_posted.isoformat(),
-            'categories': [{'name': c.name, 'icon_key': c.icon_key} for c in item.categories],
-            'star_rating': item.star_rating,
-            'review_count': item.reviews.count(),
-            'image_url': item.get_image_url()
-        })
+    # Format results for frontend consumption (categories, review counts and image URLs are batch loaded)
+    result = serialize_items(items)
     
     # Return results with metadata
     return jsonify({
@@ -249,6 +266,155 @@ def search_items():
         'items': result
     }), 200
 
+def keyword_search(q):
+    """Keyword mode of search_items: full-text match on title/description, ranked by relevance"""
+    # Optional category filter, either repeated (?category=a&category=b) or comma separated (?category=a,b)
+    categories = sorted({
+        name.strip().lower()
+        for value in request.args.getlist('category')
+        for name in value.split(',')
+        if name.strip()
+    })
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        page = max(1, int(request.args.get('page', 1)))
+    except (CursorError, ValueError):
+        return jsonify({'error': 'page and limit must be integers'}), 400
+
+    query = keyword_search_query(q, categories)
+    if query is None:
+        return jsonify({'error': 'Search query must contain at least one letter or number'}), 400
+
+    # Relevance scores aren't unique or stable enough to use as a keyset cursor, so keyword results are paged by
+    # page number. One extra row tells us whether another page exists without counting every match.
+    rows = query.offset((page - 1) * limit).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    result = serialize_items([item for item, _ in rows])
+    for item_data, (_, relevance) in zip(result, rows):
+        item_data['relevance'] = round(float(relevance or 0), 4)
+
+    return jsonify({
+        'query': q,
+        'categories': categories,
+        'page': page,
+        'limit': limit,
+        'has_more': has_more,
+        'item_count': len(result),
+        'items': result
+    }), 200
+
+"""
+-- Page of matching items (keyset by date_posted, id; shown for match=any)
+SELECT i.id, i.title, i.description, i.price, i.posted_by, i.date_posted, i.star_rating, i.image_url
+FROM item AS i
+WHERE i.price BETWEEN :min_price AND :max_price
+  AND i.star_rating BETWEEN :min_rating AND :max_rating
+  AND EXISTS (SELECT 1 FROM item_category WHERE item_id = i.id AND category_name IN (:categories))
+ORDER BY i.date_posted DESC, i.id DESC
+LIMIT :limit_plus_one;
+
+-- Facet counts: one aggregate pass over item_category for every category at once
+SELECT ic.category_name, COUNT(*) AS cnt
+FROM item_category AS ic
+JOIN item AS i ON i.id = ic.item_id
+WHERE i.price BETWEEN :min_price AND :max_price
+  AND i.star_rating BETWEEN :min_rating AND :max_rating
+  -- match=all also applies the category filter here (drill-down counts); match=any does not
+GROUP BY ic.category_name
+ORDER BY ic.category_name;
+"""
+@items_bp.route('/facets', methods=['GET'])
+@conditional_get(ITEMS)
+def faceted_search():
+    """
+    Purpose: Filter items by several categories plus price and rating ranges, and return per-category counts
+             in the same response so the search page doesn't need one request per filter change
+    Method: GET /api/items/facets?categories=<name>,<name>&match=any|all&min_price=&max_price=&min_rating=&max_rating=&limit=&cursor=
+
+    Facet counts:
+      match=any -> how many items in each category match the price/rating filters (selecting it adds those results)
+      match=all -> how many of the current results are also in each category (selecting it narrows to that many)
+
+    Returns: {'items': [...], 'next_cursor', 'total', 'facets': [{'name', 'icon_key', 'count'}], 'filters': {...}}
+    """
+    categories = sorted({
+        name.strip().lower()
+        for value in request.args.getlist('categories') + request.args.getlist('category')
+        for name in value.split(',')
+        if name.strip()
+    })
+    match_mode = request.args.get('match', 'any').strip().lower()
+    if match_mode not in ('any', 'all'):
+        return jsonify({'error': 'match must be any or all'}), 400
+
+    try:
+        min_price = Decimal(request.args['min_price']) if request.args.get('min_price') else None
+        max_price = Decimal(request.args['max_price']) if request.args.get('max_price') else None
+        min_rating = float(request.args['min_rating']) if request.args.get('min_rating') else None
+        max_rating = float(request.args['max_rating']) if request.args.get('max_rating') else None
+    except (ArithmeticError, ValueError):
+        return jsonify({'error': 'min_price, max_price, min_rating and max_rating must be numbers'}), 400
+
+    # Price/rating filters apply to both the item page and the facet counts
+    range_filters = []
+    if min_price is not None:
+        range_filters.append(Item.price >= min_price)
+    if max_price is not None:
+        range_filters.append(Item.price <= max_price)
+    if min_rating is not None:
+        range_filters.append(Item.star_rating >= min_rating)
+    if max_rating is not None:
+        range_filters.append(Item.star_rating <= max_rating)
+    selected = [category_filter(categories, match_all=(match_mode == 'all'))] if categories else []
+
+    query = Item.query.filter(*range_filters, *selected)
+    total = query.order_by(None).count()
+
+    key_columns = (Item.date_posted, Item.id)
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        cursor = request.args.get('cursor')
+        if cursor:
+            last_date, last_id = decode_cursor(cursor, 'facets')
+            query = query.filter(keyset_filter(key_columns, (date.fromisoformat(last_date), int(last_id)), True))
+    except (CursorError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e) or 'Invalid cursor'}), 400
+
+    items = query.order_by(Item.date_posted.desc(), Item.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor('facets', (items[-1].date_posted, items[-1].id))
+
+    # One GROUP BY over item_category for every category's count (icons come from the category registry)
+    facet_filters = range_filters + (selected if match_mode == 'all' else [])
+    facet_rows = (
+        db.session.query(item_category.c.category_name, func.count().label('cnt'))
+        .join(Item, Item.id == item_category.c.item_id)
+        .filter(*facet_filters)
+        .group_by(item_category.c.category_name)
+        .order_by(item_category.c.category_name)
+        .all()
+    )
+    icons = category_registry.resolve([name for name, _ in facet_rows])
+
+    return jsonify({
+        'items': serialize_items(items),
+        'next_cursor': next_cursor,
+        'total': total,
+        'facets': [{'name': name, 'icon_key': icons.get(name), 'count': cnt} for name, cnt in facet_rows],
+        'filters': {
+            'categories': categories,
+            'match': match_mode,
+            'min_price': str(min_price) if min_price is not None else None,
+            'max_price': str(max_price) if max_price is not None else None,
+            'min_rating': min_rating,
+            'max_rating': max_rating,
+        }
+    }), 200
+
 """
 SELECT
   name,
@@ -258,6 +424,8 @@ ORDER BY name ASC;
 """
 @items_bp.route('/categories', methods=['GET'])
 # Removed @login_required to allow public access
+@conditional_get(CATEGORIES)
+@response_cache.cached(lambda: ['categories'])
 def get_categories():
     """
     PHASE 2 HELPER: Get all available categories
@@ -268,11 +436,11 @@ def get_categories():
     Returns: JSON array of category names
     Security: Requires user authentication (@login_required)
     """
-    # Get all categories from database, ordered alphabetically
-    categories = Category.query.order_by(Category.name).all()
+    # Get all categories from the in-process category registry, ordered alphabetically
+    icons = category_registry.icons()
     
     # Format as simple array of category names
-    result = [{'name': category.name, 'icon_key': category.icon_key} for category in categories]
+    result = [{'name': name, 'icon_key': icons[name]} for name in sorted(icons)]
     
     return jsonify({
         'category_count': len(result),
@@ -289,6 +457,7 @@ ORDER BY date_posted DESC;
 """
 @items_bp.route('/my_items', methods=['GET'])
 @login_required
+@conditional_get(ITEMS)
 def get_my_items():
     # Fetch all items for current user in one query
     items = (
@@ -297,60 +466,8 @@ def get_my_items():
         .order_by(Item.date_posted.desc())
         .all()
     )
-    if not items:
-        return jsonify([]), 200
-
-    item_ids = [it.id for it in items]
-
-    # Batch fetch categories for all items
-    cat_rows = (
-        db.session.query(
-            item_category.c.item_id,
-            Category.name,
-            Category.icon_key
-        )
-        .join(Category, Category.name == item_category.c.category_name)
-        .filter(item_category.c.item_id.in_(item_ids))
-        .all()
-    )
-    categories_map = {}
-    for item_id, name, icon_key in cat_rows:
-        categories_map.setdefault(item_id, []).append({'name': name, 'icon_key': icon_key})
-
-    # Batch fetch review counts for all items
-    review_rows = (
-        db.session.query(Review.item_id, func.count(Review.id))
-        .filter(Review.item_id.in_(item_ids))
-        .group_by(Review.item_id)
-        .all()
-    )
-    review_count_map = {item_id: cnt for item_id, cnt in review_rows}
-
     # Build response without per-item queries
-    result = []
-    for it in items:
-        cats = categories_map.get(it.id, [])
-        if it.image_url:
-            resolved_image_url = it.image_url
-        else:
-            icon_key = cats[0]['icon_key'] if cats else None
-            resolved_image_url = (
-                f"https://api.iconify.design/{icon_key}.svg"
-                if icon_key else "https://api.iconify.design/mdi:package-variant.svg"
-            )
-
-        result.append({
-            'id': it.id,
-            'title': it.title,
-            'description': it.description,
-            'price': str(it.price),
-            'date_posted': it.date_posted.isoformat(),
-            'posted_by': it.posted_by,
-            'categories': cats,
-            'image_url': resolved_image_url,
-            'star_rating': it.star_rating,
-            'review_count': review_count_map.get(it.id, 0),
-        })
+    result = serialize_items(items)
 
     return jsonify(result), 200
 
@@ -363,6 +480,7 @@ WHERE posted_by = :username
 ORDER BY date_posted DESC;
 """
 @items_bp.route('/user/<username>', methods=['GET'])
+@conditional_get(ITEMS)
 def get_items_by_user(username):
     items = (
         Item.query
@@ -370,57 +488,7 @@ def get_items_by_user(username):
         .order_by(Item.date_posted.desc())
         .all()
     )
-    if not items:
-        return jsonify([]), 200
-
-    item_ids = [it.id for it in items]
-
-    cat_rows = (
-        db.session.query(
-            item_category.c.item_id,
-            Category.name,
-            Category.icon_key
-        )
-        .join(Category, Category.name == item_category.c.category_name)
-        .filter(item_category.c.item_id.in_(item_ids))
-        .all()
-    )
-    categories_map = {}
-    for item_id, name, icon_key in cat_rows:
-        categories_map.setdefault(item_id, []).append({'name': name, 'icon_key': icon_key})
-
-    review_rows = (
-        db.session.query(Review.item_id, func.count(Review.id))
-        .filter(Review.item_id.in_(item_ids))
-        .group_by(Review.item_id)
-        .all()
-    )
-    review_count_map = {item_id: cnt for item_id, cnt in review_rows}
-
-    result = []
-    for it in items:
-        cats = categories_map.get(it.id, [])
-        if it.image_url:
-            resolved_image_url = it.image_url
-        else:
-            icon_key = cats[0]['icon_key'] if cats else None
-            resolved_image_url = (
-                f"https://api.iconify.design/{icon_key}.svg"
-                if icon_key else "https://api.iconify.design/mdi:package-variant.svg"
-            )
-
-        result.append({
-            'id': it.id,
-            'title': it.title,
-            'description': it.description,
-            'price': str(it.price),
-            'posted_by': it.posted_by,
-            'date_posted': it.date_posted.isoformat(),
-            'categories': cats,
-            'image_url': resolved_image_url,
-            'star_rating': it.star_rating,
-            'review_count': review_count_map.get(it.id, 0),
-        })
+    result = serialize_items(items)
 
     return jsonify(result), 200
 
@@ -466,7 +534,9 @@ def update_item_image(item_id):
             image_url = (data.get('image_url') or '').strip()
             item.image_url = image_url if image_url else None
 
+        bump_version(ITEMS)
         db.session.commit()
+        response_cache.invalidate('items', f'item:{item_id}')
         return jsonify({'message': 'Image updated successfully', 'image_url': item.get_image_url()}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
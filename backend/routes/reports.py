@@ -1,44 +1,131 @@
-from flask import Blueprint, jsonify, request
-from flask_login import login_required
-from sqlalchemy import func, case
-from models import db, Item, Category, Review, User, Follow
+from flask import Blueprint, jsonify, request, url_for, current_app
+from flask_login import login_required, current_user
+from utils.admin import admin_required
+from sqlalchemy import func, or_
+from datetime import date
+from models import db, Item, User, item_category, UserStats, UserDailyPosts
+from utils.conditional import PRICES
+from utils.snapshots import VersionedSnapshot
+from utils.jobs import report_jobs, JobQueueFull, DONE
+from utils.follow_graph import follow_graph
+from utils.profiling import query_profiler
+from utils.pagination import name_page, prefix_like, CursorError
+from utils.streaming import stream_json_list, stream_export, STREAM_BATCH_SIZE, EXPORT_FORMATS
+from utils.report_stats import (
+    iter_users_posting_categories_same_day, posting_leaderboard, iter_posting_leaderboard, LEADERBOARD_BUCKETS
+)
 
 reports_bp = Blueprint('reports', __name__)
 
+# Statement counts / DB time / rows / EXPLAIN plans per report when REPORT_PROFILING is on (see utils/profiling.py)
+query_profiler.profile_blueprint(reports_bp, exclude=('report_profile',))
+
+# Every report also takes ?format=csv|ndjson, which streams its rows as a download straight from a server-side
+# cursor (see utils/streaming.py) instead of building the whole JSON response in memory.
+def export_format():
+    """The report's ?format= ('json' by default), or None if it isn't one we support"""
+    fmt = request.args.get('format', 'json').strip().lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+FORMAT_ERROR = {'error': 'format must be json, csv or ndjson'}
+
+"""
+-- One ranked query over the item_category partition (ties=first shown; ties=all uses RANK() over price only)
+SELECT category_name, id, title, price, posted_by, date_posted, description, rnk
+FROM (
+  SELECT ic.category_name, i.id, i.title, i.price, i.posted_by, i.date_posted, i.description,
+         ROW_NUMBER() OVER (PARTITION BY ic.category_name ORDER BY i.price DESC, i.date_posted ASC, i.id ASC) AS rnk
+  FROM item_category AS ic
+  JOIN item AS i ON i.id = ic.item_id
+) AS ranked
+WHERE rnk <= :top_n
+ORDER BY category_name, rnk, id;
+"""
+# Results are kept as a snapshot until an item is inserted or repriced (the 'prices' data version moves on)
+most_expensive_snapshot = VersionedSnapshot(PRICES)
+
 @reports_bp.route('/most_expensive_by_category', methods=['GET'])
 @login_required
 def most_expensive_by_category():
     """
     PHASE 3 REQUIREMENT: For each category, return the single item with the highest price
+    Query params (optional): ?top_n=<n>  (items per category, default 1, max 50)
+                             ?ties=first|all  (first: exactly top_n per category, equal prices go to the older listing;
+                                               all: every item tied with the n-th highest price is included)
+                             ?format=json|csv|ndjson
 
     Returns: JSON array containing the item with the highest price in a particular category
 
     Method: GET /api/reports/most_expensive_by_category
     Security: Requires user authentication (@login_required)
     """
-    results = []
-    categories = Category.query.order_by(Category.name).all()
-    
-    for cat in categories:
-        # Get top-priced item in this category
-        top_item = (cat.items.order_by(Item.price.desc()).limit(1).first())
-
-        if top_item:
-            # Format the price with 2 decimal places
-            formatted_price = "${:,.2f}".format(float(top_item.price))
-            
-            results.append({
-                'category': cat.name.title(),  # Capitalize each word
-                'item_id': top_item.id,
-                'title': top_item.title,
-                'price': formatted_price,
-                'posted_by': top_item.posted_by,
-                'date_posted': top_item.date_posted.strftime("%B %d, %Y"),  # Format date nicely
-                'description': top_item.description[:100] + "..." if top_item.description and len(top_item.description) > 100 else top_item.description or ""
-            })
-
+    try:
+        top_n = min(max(int(request.args.get('top_n', 1)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'top_n must be an integer'}), 400
+    ties = request.args.get('ties', 'first').strip().lower()
+    if ties not in ('first', 'all'):
+        return jsonify({'error': 'ties must be first or all'}), 400
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    if fmt != 'json':
+        rows = _most_expensive_query(top_n, ties).yield_per(STREAM_BATCH_SIZE)
+        return stream_export(fmt, 'most_expensive_by_category', EXPENSIVE_COLUMNS, rows, _expensive_row)
+
+    results = most_expensive_snapshot.get((top_n, ties), lambda: _most_expensive_by_category(top_n, ties))
     return jsonify(results), 200
+
+
+EXPENSIVE_COLUMNS = ['category', 'rank', 'item_id', 'title', 'price', 'posted_by', 'date_posted', 'description']
+
+def _most_expensive_by_category(top_n, ties):
+    return [_expensive_row(row) for row in _most_expensive_query(top_n, ties)]
+
+
+def _most_expensive_query(top_n, ties):
+    if ties == 'all':
+        rank = func.rank().over(partition_by=item_category.c.category_name, order_by=Item.price.desc())
+    else:
+        rank = func.row_number().over(
+            partition_by=item_category.c.category_name,
+            order_by=(Item.price.desc(), Item.date_posted.asc(), Item.id.asc())
+        )
+    ranked = (
+        db.session.query(
+            item_category.c.category_name.label('category_name'),
+            Item.id, Item.title, Item.price, Item.posted_by, Item.date_posted, Item.description,
+            rank.label('rnk')
+        )
+        .join(Item, Item.id == item_category.c.item_id)
+        .subquery()
+    )
+    return (
+        db.session.query(ranked)
+        .filter(ranked.c.rnk <= top_n)
+        .order_by(ranked.c.category_name, ranked.c.rnk, ranked.c.id)
+    )
+
+
+def _expensive_row(row):
+    # Format the price with 2 decimal places
+    formatted_price = "${:,.2f}".format(float(row.price))
+
+    return {
+        'category': row.category_name.title(),  # Capitalize each word
+        'rank': row.rnk,
+        'item_id': row.id,
+        'title': row.title,
+        'price': formatted_price,
+        'posted_by': row.posted_by,
+        'date_posted': row.date_posted.strftime("%B %d, %Y"),  # Format date nicely
+        'description': row.description[:100] + "..." if row.description and len(row.description) > 100 else row.description or ""
+    }
     
+# Upper bound on ?cats= for users_two_categories (each category needs its own item posted on the same day)
+MAX_REPORT_CATEGORIES = 10
+
 @reports_bp.route('/users_two_categories', methods=['GET'])
 @login_required
 def users_two_categories():
@@ -49,52 +136,73 @@ def users_two_categories():
     same user) posted two different items on the same day, such that one item has a category in the first text field and 
     the other has a category in the second text field.
     Query params: ?cat1=<X>&cat2=<Y>
+        or, for any number of categories: ?cats=<X>,<Y>,<Z>  (one different item per category, all on the same day)
+        A category given more than once counts once in either form, except that X alone (cat1=cat2=X, cats=X,X)
+        still means two different items in X.
+    Optional: ?format=json|csv|ndjson
 
     Method: GET /api/reports/users_two_categories
 
     Returns: JSON array containing a list of users who posted two items on the same day. 
     Security: Requires user authentication (@login_required)
     """
-    cat1 = request.args.get('cat1', '').strip().lower()
-    cat2 = request.args.get('cat2', '').strip().lower()
-    if not cat1 or not cat2:
-        return jsonify({'error': 'Please supply cat1:"first_category" and cat2:"second_category" query parameters'}), 400
-    
-    # Self-join Item via alias
-    ItemA = db.aliased(Item)
-    ItemB = db.aliased(Item)
-    # Alias Category for each side of the join
-    CatA = db.aliased(Category)
-    CatB = db.aliased(Category)
-
+    cats = request.args.get('cats')
+    if cats is not None:
+        categories = [c.strip().lower() for c in cats.split(',') if c.strip()]
+        if len(categories) < 2:
+            return jsonify({'error': 'Please supply at least two categories: cats=<X>,<Y>[,...]'}), 400
+        if len(categories) > MAX_REPORT_CATEGORIES:
+            return jsonify({'error': f'At most {MAX_REPORT_CATEGORIES} categories are supported'}), 400
+    else:
+        cat1 = request.args.get('cat1', '').strip().lower()
+        cat2 = request.args.get('cat2', '').strip().lower()
+        if not cat1 or not cat2:
+            return jsonify({'error': 'Please supply cat1:"first_category" and cat2:"second_category" query parameters'}), 400
+        categories = [cat1, cat2]
+    # Both forms agree on repeated names: each distinct category needs its own item, and at least two items in all
+    categories = list(dict.fromkeys(categories))
+    if len(categories) == 1:
+        categories *= 2
+
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    # Answered from the per-(user, day) category index (user_day_category) instead of self-joining item
+    # on posted_by and DATE(date_posted); see utils/report_stats.py and benchmarks/users_two_categories.py
+    users = iter_users_posting_categories_same_day(categories)
+    if fmt != 'json':
+        return stream_export(fmt, 'users_two_categories', ['username'], ((u,) for u in users))
+    return jsonify({'users': list(users)}), 200
+
+
+"""
+-- Every review an item has received is counted on the item row (see Item.review_count / *_count), so "only Good or
+-- Excellent reviews, and at least one" is a plain filter, answered for all of a seller's items at once:
+SELECT id, title, posted_by, review_count
+FROM item
+WHERE posted_by IN (:usernames)          -- omitted in batch mode without usernames (all sellers)
+  AND review_count > 0
+  AND fair_count = 0 AND poor_count = 0
+ORDER BY posted_by, id;
+"""
+def only_good_excellent_query(usernames=None):
     query = (
-        db.session.query(ItemA.posted_by)
-        # Same user, same calendar day, different items
-        .join(
-            ItemB,
-            (ItemA.posted_by == ItemB.posted_by)
-            & (func.date(ItemA.date_posted) == func.date(ItemB.date_posted))
-            & (ItemA.id != ItemB.id)
-        )
-        # Join categories for each item alias
-        .join(ItemA.categories.of_type(CatA))
-        .join(ItemB.categories.of_type(CatB))
-        # Case-insensitive category name match
-        .filter(func.lower(CatA.name) == cat1)
-        .filter(func.lower(CatB.name) == cat2)
-        .distinct()
+        db.session.query(Item.id, Item.title, Item.posted_by, Item.review_count)
+        .filter(Item.review_count > 0, Item.fair_count == 0, Item.poor_count == 0)
     )
-    users = [row[0] for row in query.all()]
-    return jsonify({'users': users}), 200
+    if usernames:
+        query = query.filter(Item.posted_by.in_(usernames))
+    return query.order_by(Item.posted_by, Item.id)
 
 
 @reports_bp.route('/items_only_good_excellent', methods=['GET'])
 @login_required
 def items_only_good_excellent():
-    # TODO: complete return values, etc.
     """
     PHASE 3 REQUIREMENT: List all items by user where all reviews are Excellent or Good (and at least one review).
     Query param: ?user=<username>
+    Optional: ?format=json|csv|ndjson
 
     Method: GET /api/reports/items_only_good_excellent
 
@@ -105,22 +213,61 @@ def items_only_good_excellent():
     username = request.args.get('user', "").strip()
     if not username:
          return jsonify({'error': 'Please supply user query parameter'}), 400
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    if fmt != 'json':
+        rows = only_good_excellent_query([username]).yield_per(STREAM_BATCH_SIZE)
+        return stream_export(fmt, 'items_only_good_excellent', ['item_id', 'title', 'posted_by', 'review_count'], rows, _good_excellent_row)
     
-    items = Item.query.filter_by(posted_by=username).all()
-    valid_scores = {'Excellent', 'Good'}
-    out = []
-    for item in items:
-         revs = item.reviews.all()
-         if revs and all(r.score in valid_scores for r in revs):
-              out.append({
-                   'item_id': item.id,
-                   'title': item.title,
-                   'review_count': len(revs)
-              })
-    
+    out = [
+        {'item_id': row.id, 'title': row.title, 'review_count': row.review_count}
+        for row in only_good_excellent_query([username])
+    ]
     return jsonify({'items': out}), 200
 
 
+@reports_bp.route('/items_only_good_excellent/batch', methods=['GET', 'POST'])
+@login_required
+def items_only_good_excellent_batch():
+    """
+    Batch version of items_only_good_excellent for many sellers at once (e.g. the whole marketplace)
+    Usernames: ?users=<u1>,<u2>,... or a JSON body {"users": [...]} (POST); none means every seller
+    Optional: ?format=json|csv|ndjson
+
+    Method: GET|POST /api/reports/items_only_good_excellent/batch
+
+    Returns: JSON {"items": [{item_id, title, posted_by, review_count}, ...]} ordered by seller, streamed as rows arrive
+    Security: Requires user authentication (@login_required)
+    """
+    usernames = [u.strip() for u in request.args.get('users', '').split(',') if u.strip()]
+    if request.method == 'POST':
+        body = request.get_json(silent=True) or {}
+        users = body.get('users') or []
+        if not isinstance(users, list):
+            return jsonify({'error': 'users must be a list of usernames'}), 400
+        usernames += [str(u).strip() for u in users if str(u).strip()]
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    rows = only_good_excellent_query(sorted(set(usernames))).yield_per(STREAM_BATCH_SIZE)
+    if fmt != 'json':
+        columns = ['item_id', 'title', 'posted_by', 'review_count']
+        return stream_export(fmt, 'items_only_good_excellent', columns, rows, _good_excellent_row)
+    return stream_json_list('items', rows, _good_excellent_row)
+
+
+def _good_excellent_row(row):
+    return {
+        'item_id': row.id,
+        'title': row.title,
+        'posted_by': row.posted_by,
+        'review_count': row.review_count
+    }
+
+
 @reports_bp.route('/top_posters', methods=['GET'])
 @login_required
 def top_posters():
@@ -128,6 +275,7 @@ def top_posters():
     """
     PHASE 3 REQUIREMENT: List user(s) who posted the most items on a given date.
     Query param: ?date=YYYY-MM-DD
+    Optional: ?format=json|csv|ndjson
 
     Method: GET /api/reports/top_posters
 
@@ -138,46 +286,117 @@ def top_posters():
     if not date_s:
         return jsonify({'error': 'Please supply a date in this format: date=YYYY-MM-DD'}), 400
     try:
-        target = func.DATE(Item.date_posted)==date_s
-    except:
+        target = date.fromisoformat(date_s)
+    except ValueError:
         return jsonify({'error': 'Invalid date format'}), 400
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
     
-    # Group and count posts (aka reviews)
-    counts = (db.session.query(Item.posted_by, func.count().label('cnt'))
-              .filter(func.date(Item.date_posted)==date_s)
-              .group_by(Item.posted_by)
-              .order_by(func.count().desc())
-              .all())
-    if not counts:  # If there are no top posters (aka no one has posted a review on the given date)
+    # Per-(user, day) post counts are maintained in user_daily_posts, so this is an index range lookup on (day, post_count)
+    query = (db.session.query(UserDailyPosts.username, UserDailyPosts.post_count.label('cnt'))
+             .filter(UserDailyPosts.day == target, UserDailyPosts.post_count > 0)
+             .order_by(UserDailyPosts.post_count.desc(), UserDailyPosts.username))
+    if fmt != 'json':
+        # Rows arrive busiest first, so the top posters are the leading rows that share the first row's count
+        def top_rows():
+            max_cnt = None
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                if max_cnt is not None and row.cnt < max_cnt:
+                    break
+                max_cnt = row.cnt
+                yield (date_s, row.username, row.cnt)
+        return stream_export(fmt, 'top_posters', ['date', 'username', 'posts'], top_rows())
+
+    counts = query.all()
+    if not counts:  # If there are no top posters (aka no one has posted an item on the given date)
         return jsonify({'top_posters': []}), 200
     
     max_cnt = counts[0].cnt
-    top_users = [row.posted_by for row in counts if row.cnt == max_cnt]
+    top_users = [row.username for row in counts if row.cnt == max_cnt]
     return jsonify({'date': date_s, 'max_posts': max_cnt, 'users': top_users}), 200
 
 
+# Longest from..to range a leaderboard request may cover (about two years)
+MAX_LEADERBOARD_DAYS = 731
+
+@reports_bp.route('/top_posters/leaderboard', methods=['GET'])
+@login_required
+def top_posters_leaderboard():
+    """
+    Date-range version of top_posters: the top posters of every day, week or month between two dates.
+    Query params: ?from=YYYY-MM-DD&to=YYYY-MM-DD  (inclusive, at most MAX_LEADERBOARD_DAYS apart)
+                  ?bucket=day|week|month  (default day; weeks start on Monday, each bucket is labelled by its first day)
+                  ?top_n=<n>  (default 1, max 50; users tied with the n-th place are included)
+                  ?format=json|csv|ndjson  (csv/ndjson: one row per bucket and leader)
+
+    Method: GET /api/reports/top_posters/leaderboard
+
+    Returns: JSON object {from, to, bucket, top_n, buckets: [{start, max_posts, leaders: [{username, posts, rank}]}]},
+             with only the buckets in which someone posted
+    Security: Requires user authentication (@login_required)
+    """
+    try:
+        start = date.fromisoformat(request.args.get('from', ''))
+        end = date.fromisoformat(request.args.get('to', ''))
+    except ValueError:
+        return jsonify({'error': 'Please supply from and to dates in this format: from=YYYY-MM-DD&to=YYYY-MM-DD'}), 400
+    if end < start:
+        return jsonify({'error': 'to must not be before from'}), 400
+    if (end - start).days >= MAX_LEADERBOARD_DAYS:
+        return jsonify({'error': f'Date range is limited to {MAX_LEADERBOARD_DAYS} days'}), 400
+    bucket = request.args.get('bucket', 'day').strip().lower()
+    if bucket not in LEADERBOARD_BUCKETS:
+        return jsonify({'error': 'bucket must be day, week or month'}), 400
+    try:
+        top_n = min(max(int(request.args.get('top_n', 1)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'top_n must be an integer'}), 400
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    # Range predicate on user_daily_posts.day (index friendly), bucketed and ranked in one query
+    if fmt != 'json':
+        rows = iter_posting_leaderboard(start, end, bucket, top_n)
+        return stream_export(fmt, 'top_posters_leaderboard', ['start', 'username', 'posts', 'rank'], rows, lambda row: row)
+    buckets = posting_leaderboard(start, end, bucket, top_n)
+    for b in buckets:
+        b['max_posts'] = b['leaders'][0]['posts']
+    return jsonify({
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'bucket': bucket,
+        'top_n': top_n,
+        'buckets': buckets
+    }), 200
+
+
 @reports_bp.route('/users_all_poor', methods=['GET'])
 @login_required
 def users_all_poor():
     # TODO: complete return values, etc.
     """
     PHASE 3 REQUIREMENT: List users who have posted reviews, and all of their reviews are 'Poor'.
+    Optional: ?format=json|csv|ndjson
 
     Method: GET /api/reports/users_all_poor
 
     Returns: JSON array containing a list of users who have only posted 'Poor' reviews.
     Security: Requires user authentication (@login_required)
     """
-    query = (db.session.query(
-            Review.user_id,
-            func.sum(case((Review.score != 'Poor', 1), else_=0)).label('nonpoor_count'),
-            # func.sum(case([(Review.score != 'Poor', 1)], else_=0)).label('nonpoor_count'),
-            func.count().label('total_count')
-        )
-        .group_by(Review.user_id)
-        .all())
-
-    users = [row.user_id for row in query if row.total_count > 0 and row.nonpoor_count == 0]
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    # user_stats keeps per-user review counts, so "all of their reviews are Poor" is a lookup
+    query = (db.session.query(UserStats.username)
+             .filter(UserStats.reviews_written > 0, UserStats.poor_reviews_written == UserStats.reviews_written)
+             .order_by(UserStats.username))
+    if fmt != 'json':
+        return stream_export(fmt, 'users_all_poor', ['username'], query.yield_per(STREAM_BATCH_SIZE))
+
+    users = [row.username for row in query.all()]
     return jsonify({'users': users}), 200
 
 
@@ -187,61 +406,78 @@ def users_no_poor_reviews_on_items():
     """
     PHASE 3 REQUIREMENT: List users who have posted items, none of which have ever received a 'Poor' review.
     Items with no reviews count as 'OK'.
+    Optional: ?format=json|csv|ndjson
 
     Method: GET /api/reports/users_no_poor_reviews_on_items
 
     Returns: JSON array containing a list of users whose posted items have never received a 'Poor' review.
     Security: Requires user authentication (@login_required)
     """
-    # Build an EXISTS subquery for "there is a poor review on this item"
-    poor_exists = (
-        db.session.query(Review.id)
-        .filter(
-            Review.item_id == Item.id,
-            Review.score   == 'Poor'
-        )
-        .exists()
-    )
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
 
-    # Select distinct posters where NOT EXISTS(poor review)
-    rows = (
-        db.session.query(Item.posted_by)
-        .distinct()
-        .filter(~poor_exists)
-        .all()
+    # user_stats counts the Poor reviews each user's items have received
+    query = (
+        db.session.query(UserStats.username)
+        .filter(UserStats.items_posted > 0, UserStats.poor_reviews_received == 0)
+        .order_by(UserStats.username)
     )
+    if fmt != 'json':
+        return stream_export(fmt, 'users_no_poor_reviews_on_items', ['username'], query.yield_per(STREAM_BATCH_SIZE))
 
-    users = [r[0] for r in rows]
+    users = [r[0] for r in query.all()]
     return jsonify({'users': users}), 200
 
 
+# Upper bound on ?users= for users_followed_by_both
+MAX_FOLLOW_QUERY_USERS = 100
+
 @reports_bp.route('/users_followed_by_both', methods=['GET'])
 @login_required
 def users_followed_by_both():
     """
     ADDITIONAL REQUIREMENT: List all users who are followed by both user1 and user2
     Query params: ?user1=<username>&user2=<username>
+        or, for any number of users: ?users=<u1>,<u2>,...&match=all|any  (all: followed by every one of them (default),
+                                                                          any: followed by at least one of them)
+    Optional: ?format=json|csv|ndjson
 
     Method: GET /api/reports/users_followed_by_both
 
     Returns: JSON array containing a list of users who are followed by both user1 and user2.
     Security: Requires user authentication (@login_required)
     """
-    user1 = request.args.get('user1', '').strip()
-    user2 = request.args.get('user2', '').strip()
-    if not user1 or not user2:
-        return jsonify({'error': 'Please supply user1 and user2 query parameters'}), 400
-    
-    # All users followed by user1
-    f1 = { f.user_username for f in Follow.query.filter_by(follower_username=user1).all() }
-
-    # All users followed by user2
-    f2 = { f.user_username for f in Follow.query.filter_by(follower_username=user2).all() }
-
-    # All users followed by both user1 and user2
-    mutual_followers = sorted(f1 & f2) # This uses the logical and operator (&), which works like an intersection here
-
-    return jsonify({'users': mutual_followers}), 200
+    users_arg = request.args.get('users')
+    if users_arg is not None:
+        usernames = [u.strip() for u in users_arg.split(',') if u.strip()]
+        if not usernames:
+            return jsonify({'error': 'Please supply at least one username: users=<u1>,<u2>[,...]'}), 400
+        if len(usernames) > MAX_FOLLOW_QUERY_USERS:
+            return jsonify({'error': f'At most {MAX_FOLLOW_QUERY_USERS} users are supported'}), 400
+    else:
+        user1 = request.args.get('user1', '').strip()
+        user2 = request.args.get('user2', '').strip()
+        if not user1 or not user2:
+            return jsonify({'error': 'Please supply user1 and user2 query parameters'}), 400
+        usernames = [user1, user2]
+    match = request.args.get('match', 'all').strip().lower()
+    if match not in ('all', 'any'):
+        return jsonify({'error': 'match must be all or any'}), 400
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    # Set operations on the in-memory follow graph (utils/follow_graph.py) instead of loading Follow rows
+    follow_graph.ensure_current()
+    if match == 'all':
+        users = follow_graph.followed_by_all(usernames)
+    else:
+        users = follow_graph.followed_by_any(usernames)
+
+    if fmt != 'json':
+        return stream_export(fmt, 'users_followed_by_both', ['username'], ((u,) for u in users))
+    return jsonify({'users': users}), 200
 
 
 @reports_bp.route('/users_never_posted', methods=['GET'])
@@ -249,20 +485,48 @@ def users_followed_by_both():
 def users_never_posted():
     """
     ADDITIONAL REQUIREMENT: List all registered users who have never posted an item
+    Optional: ?prefix=<start of username>
+              ?limit=<page size>&cursor=<next_cursor>  (keyset pagination, default 24 per page, max 100)
+              ?format=json|csv|ndjson  (csv/ndjson: every matching user, streamed)
 
     Method: GET /api/reports/users_never_posted
 
     Returns: JSON array containing a list of users who have never posted an item.
+             With prefix/limit/cursor: {'users': [...], 'next_cursor', 'limit', 'total'} (total on the first page only)
     Security: Requires user authentication (@login_required)
     """
-    # Set of all users who have posted an item
-    have_posted = { r[0] for r in db.session.query(Item.posted_by).distinct().all() }
+    fmt = export_format()
+    if fmt is None:
+        return jsonify(FORMAT_ERROR), 400
+
+    # Anti-join projected to the username only: users with no user_stats row yet, or a row that says they have
+    # never posted (user_stats.items_posted is maintained by create_item)
+    #   SELECT u.username FROM user u LEFT JOIN user_stats s ON s.username = u.username
+    #   WHERE (s.username IS NULL OR s.items_posted = 0) [AND u.username LIKE :prefix%] [AND u.username > :last]
+    #   ORDER BY u.username [LIMIT :limit_plus_one];
+    query = (
+        db.session.query(User.username)
+        .outerjoin(UserStats, UserStats.username == User.username)
+        .filter(or_(UserStats.username.is_(None), UserStats.items_posted == 0))
+        .order_by(User.username)
+    )
+    prefix = request.args.get('prefix', '').strip()
+    if prefix:
+        query = query.filter(prefix_like(User.username, prefix))
+
+    if fmt != 'json':
+        return stream_export(fmt, 'users_never_posted', ['username'], query.yield_per(STREAM_BATCH_SIZE))
 
-    # Set of all users
-    all_users = {user.username for user in User.query.all() }
+    if any(name in request.args for name in ('prefix', 'limit', 'cursor')):
+        try:
+            rows, next_cursor, limit, total = name_page(
+                query, User.username, 'users_never_posted', request.args.get('limit'), request.args.get('cursor')
+            )
+        except CursorError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'users': [r[0] for r in rows], 'next_cursor': next_cursor, 'limit': limit, 'total': total}), 200
 
-    # Set of users that have never posted an item
-    never_posted = sorted(all_users - have_posted)
+    never_posted = [r[0] for r in query.all()]
 
     return jsonify({'users': never_posted}), 200
 
@@ -270,3 +534,98 @@ def users_never_posted():
 
 
 
+
+
+def _job_reports():
+    """{report name: endpoint} for every GET report in this blueprint, e.g. {'top_posters/leaderboard': 'reports.top_posters_leaderboard'}"""
+    prefix = url_for('reports.submit_report_job').rsplit('jobs', 1)[0]  # '/api/reports/'
+    return {
+        rule.rule[len(prefix):]: rule.endpoint
+        for rule in current_app.url_map.iter_rules()
+        if rule.endpoint.startswith('reports.') and 'GET' in rule.methods and not rule.arguments
+        and rule.rule.startswith(prefix) and not rule.rule[len(prefix):].startswith('_')
+    }
+
+@reports_bp.route('/jobs', methods=['POST'])
+@login_required
+def submit_report_job():
+    """
+    Run a report in the background instead of holding this request open while it computes.
+    Body: {"report": "<report path, e.g. users_two_categories or top_posters/leaderboard>",
+           "params": {<the report's query params, e.g. "cat1": "phone", "cat2": "audio">}}
+
+    Method: POST /api/reports/jobs
+
+    Returns: JSON object {job, status_url, deduplicated}. 202 while the job is queued/running (poll status_url),
+             200 if an identical job of yours already finished within the result TTL (job.result is the report's response).
+             503 when too many jobs are already pending.
+    Security: Requires user authentication (@login_required)
+    """
+    data = request.get_json(silent=True) or {}
+    report = str(data.get('report', '')).strip().strip('/')
+    endpoint = _job_reports().get(report)
+    if endpoint is None:
+        return jsonify({'error': f'Unknown report: {report!r}', 'reports': sorted(_job_reports())}), 400
+
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return jsonify({'error': 'params must be an object of query parameters'}), 400
+    query = {}
+    for name, value in params.items():
+        if isinstance(value, list):
+            value = ','.join(str(v) for v in value)
+        elif isinstance(value, (dict, type(None))):
+            return jsonify({'error': f'params.{name} must be a string, number or list'}), 400
+        query[str(name)] = str(value)
+
+    try:
+        job, created = report_jobs.submit(report, endpoint, query, current_user.username)
+    except JobQueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    status = 200 if job.status == DONE else 202
+    return jsonify({
+        'job': job.to_dict(),
+        'status_url': url_for('reports.get_report_job', job_id=job.id),
+        'deduplicated': not created
+    }), status
+
+
+@reports_bp.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_report_job(job_id):
+    """
+    Poll a report job. status is queued, running, done (result holds the report's JSON) or failed (see error).
+
+    Method: GET /api/reports/jobs/<job_id>
+
+    Returns: JSON object describing the job, or 404 once it is unknown/expired (finished jobs are kept REPORT_JOB_TTL seconds)
+    Security: Requires user authentication (@login_required); only the user who submitted the job can read it
+    """
+    job = report_jobs.get(job_id, current_user.username)
+    if job is None:
+        return jsonify({'error': 'Job not found (it may have expired)'}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@reports_bp.route('/_profile', methods=['GET', 'DELETE'])
+@admin_required
+def report_profile():
+    """
+    Per-report SQL profile of this worker's recent report requests (only collected while REPORT_PROFILING is on):
+    request count and p50/p95/p99/max of wall time, SQL statements, DB time and rows fetched.
+    Optional: ?plans=1 adds each report's statements with the EXPLAIN plan captured the first time they ran.
+    DELETE clears the collected numbers and cached plans.
+
+    Method: GET|DELETE /api/reports/_profile
+
+    Returns: JSON object {enabled, window, reports: {<report>: {...}}}
+    Security: Requires an administrator (@admin_required, see ADMIN_USERNAMES); plans expose table and index names
+    """
+    if request.method == 'DELETE':
+        query_profiler.reset()
+        return jsonify({'message': 'Report profile cleared.'}), 200
+    plans = request.args.get('plans', '').lower() in ('1', 'true', 'yes')
+    return jsonify(query_profiler.stats(plans=plans)), 200
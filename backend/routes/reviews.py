@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort
 from datetime import date
 from flask_login import login_required, current_user
-from models import db, Review, Item
+from models import db, Review, Item, REVIEW_HISTOGRAM_COLUMNS
+from utils.cache import response_cache
+from utils.report_stats import record_review
+from utils.conditional import conditional_get, bump_version, ITEMS, REVIEWS
 
 reviews_bp = Blueprint('reviews', __name__)
 
@@ -41,11 +44,18 @@ def create_review(item_id):
         remark=remark
     )
     db.session.add(review)
-    item.star_rating = item.calculate_star_rating() # update item's star rating and store the value back into the star review column
+    # Update the item's running score sum, review count and star rating in one UPDATE (O(1), no matter how many reviews it has)
+    Item.add_review_score(item_id, score)
+    record_review(current_user.username, item.posted_by, score)  # reporting summaries (user_stats)
+    bump_version(ITEMS, REVIEWS)
     db.session.commit()
+    # The item's star rating and review count show up in the listings, the item page and its review list
+    response_cache.invalidate('items', f'item:{item_id}', f'reviews:{item_id}')
     return jsonify({'message': 'Review submitted'}), 201
 
 @reviews_bp.route('/item/<int:item_id>', methods=['GET'])
+@conditional_get(REVIEWS)
+@response_cache.cached(lambda item_id: [f'reviews:{item_id}'])
 def list_reviews_for_item(item_id):
     reviews = Review.query.filter_by(item_id=item_id).all()
     return jsonify([{
@@ -57,13 +67,29 @@ def list_reviews_for_item(item_id):
     } for r in reviews]), 200
 
 @reviews_bp.route('/item/<int:item_id>/rating', methods=['GET'])
+@conditional_get(REVIEWS)
 def get_star_rating(item_id):
-    item = Item.query.get_or_404(item_id)
-    rating = item.calculate_star_rating()
-    review_count = item.reviews.count()
-    return jsonify({'item_id': item.id, 'star_rating': rating, 'review_count': review_count}), 200
+    # Read the maintained aggregates directly instead of recomputing from the review table
+    row = (
+        db.session.query(
+            Item.id, Item.star_rating, Item.review_count,
+            *(getattr(Item, column) for column in REVIEW_HISTOGRAM_COLUMNS.values())
+        )
+        .filter(Item.id == item_id)
+        .first()
+    )
+    if row is None:
+        abort(404)
+    histogram = {score: getattr(row, column) for score, column in REVIEW_HISTOGRAM_COLUMNS.items()}
+    return jsonify({
+        'item_id': row.id,
+        'star_rating': row.star_rating,
+        'review_count': row.review_count,
+        'review_histogram': histogram
+    }), 200
 
 @reviews_bp.route('/user/<username>', methods=['GET'])
+@conditional_get(REVIEWS)
 def list_reviews_for_user(username):
     # 1) find that user’s items
     seller_items = Item.query.filter_by(posted_by=username).all()
@@ -1,24 +1,75 @@
 from flask import Blueprint, request, jsonify
 from models import db, User
+from sqlalchemy.exc import IntegrityError
 from flask_login import login_required, current_user  # Ensures that only logged-in users can access protected backend API functions
 from utils.imgur import upload_to_imgur
+from utils.cache import response_cache
+from utils.user_cache import profile_cache, invalidate_user
+from utils.report_stats import ensure_user_stats, delete_user_stats, follow_counts
+from utils.feed import delete_timelines
+from utils.recommendations import delete_follow_suggestions
+from utils.conditional import bump_version, ITEMS, REVIEWS
+from utils.pagination import name_page, prefix_like, CursorError
 
 users_bp = Blueprint('users', __name__)
 
+"""
+-- Keyset pagination over the primary key, optionally limited to usernames starting with :prefix
+SELECT username, firstName, lastName, email
+FROM user
+WHERE username LIKE :prefix_pattern        -- e.g. 'jo%' (a range on the primary key)
+  AND username > :last_username            -- omitted on the first page
+ORDER BY username
+LIMIT :limit_plus_one;
+
+SELECT COUNT(*) FROM user WHERE username LIKE :prefix_pattern;   -- first page only
+"""
 @users_bp.route('/', methods=['GET'])  # /api/users/   -- Calling 'GET' returns the user db in a list
 @login_required
 def list_users():
-    users = User.query.all()
+    """
+    Query params (all optional):
+      prefix=<start of username>
+      limit=<page size>                       (default 24, max 100)
+      cursor=<next_cursor from the previous page>
+
+    If none of them are given the full list is returned as a plain JSON array (the original behavior).
+    Otherwise returns {'users': [...], 'next_cursor': <string or null>, 'limit', 'total'}, where total (the number
+    of matching users) is only counted on the first page (null when a cursor is given).
+    """
+    # Only the columns we return (never the password hash)
+    query = db.session.query(User.username, User.firstName, User.lastName, User.email).order_by(User.username)
+
+    paginate = any(name in request.args for name in ('prefix', 'limit', 'cursor'))
+    if not paginate:
+        users = query.all()
+        payload = [
+            {
+                'username': u.username,
+                'first_name': u.firstName,
+                'last_name': u.lastName,
+                'email': u.email
+            }
+            for u in users  # This syntax looks crazy, but it's just a dictionary comprehension inside a list (this makes a list of dictionaries, aka a list of user info)
+        ]
+        return jsonify(payload), 200
+
+    prefix = request.args.get('prefix', '').strip()
+    if prefix:
+        query = query.filter(prefix_like(User.username, prefix))
+    try:
+        users, next_cursor, limit, total = name_page(
+            query, User.username, 'users', request.args.get('limit'), request.args.get('cursor')
+        )
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+
     payload = [
-        {
-            'username': u.username,
-            'first_name': u.firstName,
-            'last_name': u.lastName,
-            'email': u.email
-        }
-        for u in users  # This syntax looks crazy, but it's just a dictionary comprehension inside a list (this makes a list of dictionaries, aka a list of user info)
+        {'username': u.username, 'first_name': u.firstName, 'last_name': u.lastName, 'email': u.email}
+        for u in users
     ]
-    return jsonify(payload), 200
+    return jsonify({'users': payload, 'next_cursor': next_cursor, 'limit': limit, 'total': total}), 200
+
 
 @users_bp.route('/', methods=['POST'])  # /api/users/   -- Calling 'POST' creates a new user
 @login_required
@@ -32,9 +83,69 @@ def create_user():
         password=data.get('password', '')
     )
     db.session.add(user)
+    db.session.flush()
+    ensure_user_stats(user.username)  # reporting summary row (user_stats)
     db.session.commit()
     return jsonify({'message': 'User created'}), 201
 
+# Most usernames accepted by one batch profile lookup
+MAX_PROFILE_BATCH = 300
+
+"""
+-- Only the usernames not already in the profile cache
+SELECT username, firstName, lastName, profile_image_url
+FROM user
+WHERE username IN (:usernames);
+"""
+@users_bp.route('/profiles', methods=['GET', 'POST'])  # /api/users/profiles  -- public profile fields of many users at once
+@login_required
+def batch_profiles():
+    """
+    Display name and avatar for many users in one request (seller cards, review cards, follower lists)
+    Usernames: ?usernames=alice,bob,...  or a POST body {"usernames": ["alice", "bob", ...]} (at most MAX_PROFILE_BATCH)
+
+    Each profile is kept in profile_cache for USER_PROFILE_CACHE_TTL seconds under its 'user:<username>' tag, so the
+    profile write paths drop it; the usernames that miss are loaded together with a single IN query.
+
+    Returns: JSON object {'users': {username: {username, first_name, last_name, profile_image_url}}, 'not_found': [...]}
+    """
+    if request.method == 'POST':
+        usernames = (request.get_json(silent=True) or {}).get('usernames')
+    else:
+        usernames = request.args.get('usernames', '').split(',')
+    if not isinstance(usernames, list) or not all(isinstance(u, str) for u in usernames):
+        return jsonify({'error': 'usernames must be a list of usernames'}), 400
+    usernames = list(dict.fromkeys(u.strip() for u in usernames if u.strip()))
+    if len(usernames) > MAX_PROFILE_BATCH:
+        return jsonify({'error': f'At most {MAX_PROFILE_BATCH} usernames per request'}), 400
+
+    profiles = {}
+    if profile_cache.enabled:
+        for username in usernames:
+            cached = profile_cache.get(username)
+            if cached is not None:
+                profiles[username] = cached
+
+    missing = [u for u in usernames if u not in profiles]
+    if missing:
+        rows = (
+            db.session.query(User.username, User.firstName, User.lastName, User.profile_image_url)
+            .filter(User.username.in_(missing))
+            .all()
+        )
+        for u in rows:
+            profile = {
+                'username': u.username,
+                'first_name': u.firstName,
+                'last_name': u.lastName,
+                'profile_image_url': u.profile_image_url or DEFAULT_AVATAR
+            }
+            profiles[u.username] = profile
+            if profile_cache.enabled:
+                profile_cache.set(u.username, profile, tags=[f'user:{u.username}'])
+
+    return jsonify({'users': profiles, 'not_found': [u for u in usernames if u not in profiles]}), 200
+
 @users_bp.route('/<username>', methods=['GET'])  # /api/users/<username>  -- Calling 'GET' returns the user's data
 @login_required
 def get_user(username):
@@ -44,7 +155,8 @@ def get_user(username):
         'first_name': user.firstName,
         'last_name': user.lastName,
         'email': user.email,
-        'profile_image_url': user.profile_image_url
+        'profile_image_url': user.profile_image_url,
+        **follow_counts(user.username)  # followers / following, maintained in user_stats
     })
 
 @users_bp.route('/<username>', methods=['PUT'])  # /api/users/<username>  -- Calling 'PUT' updates the user's data
@@ -56,14 +168,19 @@ def update_user(username):
     user.lastName = data.get('last_name', user.lastName)
     user.email = data.get('email', user.email)
     db.session.commit()
+    invalidate_user(username)
     return jsonify({'message': 'User updated'})
 
 @users_bp.route('/<username>', methods=['DELETE'])  # /api/users/<username>  -- Calling 'DELETE' deletes the user's data
 @login_required
 def delete_user(username):
     user = User.query.get_or_404(username)
+    delete_user_stats(username)  # summary rows reference the user, so they go first
+    delete_timelines(username)
+    delete_follow_suggestions(username)
     db.session.delete(user)
     db.session.commit()
+    invalidate_user(username)
     return jsonify({'message': 'User deleted'})
 
 @users_bp.route('/profile', methods=['GET'])
@@ -74,20 +191,41 @@ def get_profile():
         'first_name': current_user.firstName,
         'last_name': current_user.lastName,
         'email': current_user.email,
-        'profile_image_url ': current_user.profile_image_url
+        'profile_image_url ': current_user.profile_image_url,
+        **follow_counts(current_user.username)  # followers / following, maintained in user_stats
     })
 
 @users_bp.route('/profile', methods=['POST'])
 @login_required
 def update_profile():
     form = request.form
+    old_username = current_user.username
+
+    new_username = form.get('username', old_username)
+    new_email = form.get('email', current_user.email)
+    if new_username != old_username and db.session.get(User, new_username) is not None:
+        return jsonify({'message': 'Username already taken'}), 409
+    if new_email != current_user.email and User.query.filter_by(email=new_email).first() is not None:
+        return jsonify({'message': 'Email already registered'}), 409
 
     current_user.firstName = form.get('first_name', current_user.firstName)
     current_user.lastName = form.get('last_name', current_user.lastName)
-    current_user.username = form.get('username', current_user.username)
-    current_user.email = form.get('email', current_user.email)
+    current_user.username = new_username
+    current_user.email = new_email
 
-    db.session.commit()
+    try:
+        # The summary, timeline and suggestion rows follow a rename (ON UPDATE CASCADE); items, reviews and follows
+        # reference the username with ON UPDATE RESTRICT, so renaming a user who has any of those is refused
+        if current_user.username != old_username:
+            bump_version(ITEMS, REVIEWS)  # usernames appear in item and review payloads
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': "Username can't be changed once you have items, reviews or follows"}), 409
+    invalidate_user(old_username)
+    if current_user.username != old_username:
+        # Usernames are embedded in item and review payloads (posted_by, user), so a rename touches everything
+        response_cache.clear()
 
     return jsonify({
         'message': 'Profile updated successfully'}), 200
@@ -114,6 +252,7 @@ def update_my_avatar():
         current_user.profile_image_url = image_url or None
 
     db.session.commit()
+    invalidate_user(current_user.username)
     return jsonify({
         'message': 'Profile image updated',
         'profile_image_url': current_user.profile_image_url or DEFAULT_AVATAR
@@ -0,0 +1,22 @@
+from functools import wraps
+from flask import current_app, jsonify
+from flask_login import login_required, current_user
+
+# Operator-only routes (bulk import, cache / job stats, report profiles).
+# There are no roles in the user table, so administrators are listed by username in the ADMIN_USERNAMES config
+# (comma-separated env var). With the list empty, which is the default, nobody can use these routes over HTTP;
+# the `flask` CLI commands remain available to whoever runs the server.
+
+
+def is_admin(user):
+    return user.is_authenticated and user.get_id() in current_app.config.get('ADMIN_USERNAMES', ())
+
+
+def admin_required(view):
+    """Like @login_required, but the user must also be listed in ADMIN_USERNAMES (403 otherwise)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not is_admin(current_user):
+            return jsonify({'error': 'Administrator access required'}), 403
+        return view(*args, **kwargs)
+    return login_required(wrapper)
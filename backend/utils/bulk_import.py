@@ -0,0 +1,269 @@
+import csv
+import datetime
+import json
+import time
+from decimal import Decimal, InvalidOperation
+import bcrypt
+from models import db, User, Item, Review, Follow, item_category
+from utils.cache import response_cache
+from utils.categories import bulk_upsert_categories, category_registry
+from utils.report_stats import rebuild_report_stats
+from utils.feed import rebuild_timelines
+from utils.conditional import bump_version, ITEMS, CATEGORIES, REVIEWS, PRICES, FOLLOWS
+
+# Streaming bulk import for users, categories, items, reviews and follows (replaces seeding row-by-row through
+# ORM objects in sample_data/generate_sample_data.ipynb).
+#
+# Input is read one line at a time and buffered per table. Once batch_size records are waiting, every buffer is
+# written with one executemany INSERT per table, parents first (users -> categories -> items -> item_category ->
+# reviews -> follows), and committed, so each transaction is bounded and memory stays flat for any file size.
+# Records may only reference rows that appear earlier in the input (or already exist in the database).
+#
+# Formats:
+#   NDJSON - one JSON object per line, with a "type" field: {"type": "item", "title": ..., "categories": ["audio"]}
+#   CSV    - one record type per file (given separately), header row with the field names below;
+#            list fields (item categories) are separated with "|"
+#
+# Fields per type (aliases in parentheses):
+#   user:     username, firstName (first_name), lastName (last_name), email, password_hash or password, profile_image_url
+#   category: name, icon_key
+#   item:     id (optional, AUTO_INCREMENT if missing), title, description, price, posted_by, date_posted, image_url, categories
+#   review:   item_id, user_id (user), score, remark, review_date
+#   follow:   user_username (followee), follower_username (follower)
+"""
+INSERT INTO user (username, password, firstName, lastName, email, profile_image_url) VALUES (...), (...), ...;
+INSERT INTO category (name, icon_key) VALUES ... ON DUPLICATE KEY UPDATE ...;   -- see utils/categories.py
+INSERT INTO item (id, title, description, price, posted_by, date_posted, image_url) VALUES (...), (...), ...;  -- ids given
+INSERT INTO item (title, description, price, posted_by, date_posted, image_url) VALUES (...), (...), ... [RETURNING id];  -- no id
+SELECT posted_by, title FROM item WHERE id BETWEEN LAST_INSERT_ID() AND LAST_INSERT_ID() + :n - 1 ORDER BY id;  -- MySQL
+INSERT INTO item_category (item_id, category_name) VALUES (...), (...), ...;
+INSERT INTO review (user_id, item_id, score, remark, review_date) VALUES (...), (...), ...;
+INSERT INTO follow (user_username, follower_username) VALUES (...), (...), ...;
+"""
+
+RECORD_TYPES = ('user', 'category', 'item', 'review', 'follow')
+DEFAULT_BATCH_SIZE = 1000
+
+
+class BulkImportError(ValueError):
+    """Bad input record, or a batch the database rejected. line is the input line number (if known)."""
+
+    def __init__(self, message, line=None):
+        super().__init__(f'line {line}: {message}' if line else message)
+        self.line = line
+
+
+def read_ndjson(lines):
+    """Yield (record_type, record, line_number) from an iterable of NDJSON lines"""
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise BulkImportError(f'invalid JSON ({e})', line_no)
+        if not isinstance(record, dict):
+            raise BulkImportError('each line must be a JSON object', line_no)
+        yield record.pop('type', None), record, line_no
+
+
+def read_csv(lines, record_type):
+    """Yield (record_type, record, line_number) from an iterable of CSV lines (header row first)"""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        if 'categories' in record:
+            record['categories'] = [c for c in (record['categories'] or '').split('|') if c.strip()]
+        yield record_type, record, reader.line_num
+
+
+class BulkImporter:
+    """Buffers records per table and writes them in executemany batches. Use add() for each record, then finish()."""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, rebuild_aggregates=True):
+        self.batch_size = batch_size
+        self.rebuild_aggregates = rebuild_aggregates
+        self.buffers = {name: [] for name in ('user', 'item', 'item_category', 'review', 'follow')}
+        self.new_items = []   # (item row without an id, its category names): the database assigns their ids
+        self.categories = {}  # category name -> icon_key (or None) waiting to be upserted
+        self.pending = 0
+        self.counts = {name: 0 for name in RECORD_TYPES}
+        self.counts['item_category'] = 0
+        self.batches = 0
+        self.started = time.monotonic()
+        self.last_line = None
+
+    def add(self, record_type, record, line=None):
+        self.last_line = line
+        if record_type not in RECORD_TYPES:
+            raise BulkImportError(f"unknown record type {record_type!r} (expected one of {', '.join(RECORD_TYPES)})", line)
+        try:
+            getattr(self, f'_add_{record_type}')(record)
+        except (KeyError, ValueError, InvalidOperation, TypeError, AttributeError) as e:
+            raise BulkImportError(f'bad {record_type} record ({e!r})', line)
+        self.counts[record_type] += 1
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far in one bounded transaction"""
+        if not self.pending:
+            return
+        try:
+            if self.buffers['user']:
+                db.session.execute(db.insert(User), self.buffers['user'])
+            if self.categories:
+                bulk_upsert_categories(self.categories)
+            if self.buffers['item']:
+                db.session.execute(db.insert(Item), self.buffers['item'])
+            if self.new_items:
+                item_ids = _insert_items_returning_ids([row for row, _ in self.new_items])
+                for item_id, (_, names) in zip(item_ids, self.new_items):
+                    self.buffers['item_category'].extend({'item_id': item_id, 'category_name': n} for n in names)
+            if self.buffers['item_category']:
+                db.session.execute(item_category.insert(), self.buffers['item_category'])
+            if self.buffers['review']:
+                db.session.execute(db.insert(Review), self.buffers['review'])
+            if self.buffers['follow']:
+                db.session.execute(db.insert(Follow), self.buffers['follow'])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise BulkImportError(f'batch ending here was rejected by the database: {e.__class__.__name__}: {e}', self.last_line)
+        self.counts['item_category'] += len(self.buffers['item_category'])
+        for rows in self.buffers.values():
+            rows.clear()
+        self.new_items.clear()
+        self.categories.clear()
+        self.pending = 0
+        self.batches += 1
+
+    def finish(self):
+        """Flush the last batch, refresh derived data, and return a throughput report"""
+        self.flush()
+        if self.rebuild_aggregates and self.counts['review']:
+            Item.rebuild_review_aggregates()
+        if self.rebuild_aggregates:
+            rebuild_report_stats()
+            rebuild_timelines()
+        bump_version(ITEMS, CATEGORIES, REVIEWS, PRICES, FOLLOWS)
+        db.session.commit()
+        response_cache.clear()
+        category_registry.invalidate()
+
+        elapsed = time.monotonic() - self.started
+        total = sum(self.counts[name] for name in RECORD_TYPES)
+        return {
+            'rows': dict(self.counts),
+            'total_records': total,
+            'batches': self.batches,
+            'elapsed_seconds': round(elapsed, 3),
+            'records_per_second': round(total / elapsed, 1) if elapsed else None,
+        }
+
+    # One method per record type: normalize the record into the column dict for its table
+
+    def _add_user(self, r):
+        password = r.get('password_hash')
+        if not password:
+            # Hashing is deliberately slow; pre-hash passwords in the export for large imports
+            password = bcrypt.hashpw(r['password'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.buffers['user'].append({
+            'username': r['username'],
+            'password': password,
+            'firstName': r.get('firstName') or r['first_name'],
+            'lastName': r.get('lastName') or r['last_name'],
+            'email': r['email'],
+            'profile_image_url': r.get('profile_image_url') or None,
+        })
+
+    def _add_category(self, r):
+        name = r['name'].strip().lower()
+        if not name:
+            raise ValueError('empty category name')
+        self.categories[name] = r.get('icon_key') or self.categories.get(name)
+
+    def _add_item(self, r):
+        item_id = int(r['id']) if r.get('id') else None
+        row = {
+            'title': r['title'],
+            'description': r['description'],
+            'price': Decimal(str(r['price'])),
+            'posted_by': r['posted_by'],
+            'date_posted': _parse_date(r.get('date_posted')),
+            'image_url': r.get('image_url') or None,
+        }
+        names = sorted({c.strip().lower() for c in r.get('categories') or [] if c.strip()})
+        for name in names:
+            self.categories.setdefault(name, None)
+        if item_id is None:
+            # No id in the file: AUTO_INCREMENT assigns one when the batch is written (never max(id) + 1 here,
+            # which a concurrent create_item could take first), and its categories are linked after that
+            self.new_items.append((row, names))
+        else:
+            self.buffers['item'].append(dict(row, id=item_id))
+            self.buffers['item_category'].extend({'item_id': item_id, 'category_name': name} for name in names)
+
+    def _add_review(self, r):
+        score = r['score']
+        if score not in ('Excellent', 'Good', 'Fair', 'Poor'):
+            raise ValueError(f'invalid score {score!r}')
+        self.buffers['review'].append({
+            'user_id': r.get('user_id') or r['user'],
+            'item_id': int(r['item_id']),
+            'score': score,
+            'remark': r.get('remark') or None,
+            'review_date': _parse_date(r.get('review_date')),
+        })
+
+    def _add_follow(self, r):
+        self.buffers['follow'].append({
+            'user_username': r.get('user_username') or r['followee'],
+            'follower_username': r.get('follower_username') or r['follower'],
+        })
+
+
+def _insert_items_returning_ids(rows):
+    """INSERT items without an id (one statement) and return the ids the database assigned, in the order of rows"""
+    if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+        # One batched INSERT ... RETURNING id (SQLite, PostgreSQL, MariaDB)
+        result = db.session.execute(Item.__table__.insert().returning(Item.id, sort_by_parameter_order=True), rows)
+        return list(result.scalars())
+
+    # MySQL has no RETURNING. A single multi-row INSERT is a "simple insert" to InnoDB: its AUTO_INCREMENT values are
+    # reserved together, so they run from LAST_INSERT_ID() (the first one, cursor.lastrowid) for len(rows) ids.
+    result = db.session.execute(Item.__table__.insert().values(rows))
+    ids = list(range(result.lastrowid, result.lastrowid + len(rows)))
+    # One primary key range read to confirm it before item_category rows are linked to those ids: a server that
+    # handed out a non-consecutive range (another writer interleaved) fails the batch instead of mislinking categories
+    stored = db.session.execute(
+        db.select(Item.posted_by, Item.title).where(Item.id.between(ids[0], ids[-1])).order_by(Item.id)
+    ).all()
+    if [tuple(row) for row in stored] != [(row['posted_by'], row['title']) for row in rows]:
+        raise BulkImportError('AUTO_INCREMENT ids of the batch were not consecutive '
+                              '(set innodb_autoinc_lock_mode to 0 or 1, or give the items ids)')
+    return ids
+
+
+def _parse_date(value):
+    if not value:
+        return datetime.date.today()
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def run_import(lines, fmt='ndjson', record_type=None, batch_size=DEFAULT_BATCH_SIZE, rebuild_aggregates=True):
+    """Import every record from lines (any iterable of text lines, e.g. an open file) and return the report"""
+    if fmt == 'ndjson':
+        records = read_ndjson(lines)
+    elif fmt == 'csv':
+        if record_type not in RECORD_TYPES:
+            raise BulkImportError(f"CSV imports need a record type (one of {', '.join(RECORD_TYPES)})")
+        records = read_csv(lines, record_type)
+    else:
+        raise BulkImportError('format must be ndjson or csv')
+
+    importer = BulkImporter(batch_size=batch_size, rebuild_aggregates=rebuild_aggregates)
+    for rtype, record, line in records:
+        importer.add(rtype, record, line)
+    return importer.finish()
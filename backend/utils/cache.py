@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, Response, g
+
+# In-process response cache for the public, read-heavy endpoints (list_items, categories, item detail, reviews).
+# Entries are evicted least-recently-used once the cache is full, and expire after a TTL no matter what.
+# Every entry is stored with a set of "tags" (e.g. 'items', 'item:42', 'reviews:42'), and the write paths call
+# response_cache.invalidate(<tags>) after they commit, so readers never see stale data from this process.
+# Note: each Flask worker process has its own cache; the TTL bounds how long another worker can lag behind.
+
+
+class LRUCache:
+    """Size-bounded LRU + TTL cache with tag-based invalidation and hit/miss counters. Thread safe."""
+
+    def __init__(self, max_entries=512, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}                # tag -> set of keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)  # mark as most recently used
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tags=(), ttl=None):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value, frozenset(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags"""
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key):
+        # Caller must hold the lock
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class ResponseCache(LRUCache):
+    """LRUCache for whole Flask responses, configured from app.config like our other extensions"""
+
+    enabled = True
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+
+    def cached(self, tags):
+        """
+        Route decorator. tags(**view_args) returns the tags for this response, e.g.
+            @response_cache.cached(lambda item_id: ['items', f'item:{item_id}'])
+        Only successful (200) responses are cached. The cache key is the full path including the query string, plus
+        the data_version numbers when @conditional_get is stacked outside this decorator, so the cached body always
+        belongs to the versions the ETag names.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+
+                key = request.full_path
+                if g.get('data_versions'):
+                    key += '|' + g.data_versions
+                hit = self.get(key)
+                if hit is not None:
+                    body, status, mimetype = hit
+                    response = Response(body, status=status, mimetype=mimetype)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = view(*args, **kwargs)
+                if isinstance(response, tuple):
+                    response, status = response[0], response[1]
+                    response.status_code = status
+                if response.status_code == 200:
+                    self.set(key, (response.get_data(), response.status_code, response.mimetype), tags(**kwargs))
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,150 @@
+import threading
+import time
+from sqlalchemy.dialects import mysql, sqlite
+from models import db, Category
+from utils.conditional import current_version, CATEGORIES
+
+# Category helpers shared by item creation, item serialization and the bulk importer.
+"""
+-- MySQL
+INSERT INTO category (name, icon_key) VALUES (:name1, :icon1), (:name2, :icon2), ...
+ON DUPLICATE KEY UPDATE icon_key = VALUES(icon_key);   -- or "name = name" to leave existing rows alone
+
+-- SQLite
+INSERT INTO category (name, icon_key) VALUES ... ON CONFLICT (name) DO UPDATE SET icon_key = excluded.icon_key;  -- or DO NOTHING
+"""
+
+DEFAULT_ICON_KEY = 'mdi:help-circle'
+
+
+class CategoryRegistry:
+    """
+    Process-wide name -> icon_key map of every category (a small, slowly changing set of ~100 rows).
+    Loaded once with a single SELECT and then served from memory, so item listings and image fallbacks no longer
+    join the category table. It reloads when:
+      - this process changes categories (ensure() / bulk import call invalidate()),
+      - a lookup asks for a name we don't know yet (probably created by another worker),
+      - icons() finds the 'categories' data_version has moved on since the load (another worker wrote), or
+      - it is older than max_age seconds (CATEGORY_REGISTRY_MAX_AGE; picks up icon changes made by other workers).
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._icons = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_age = app.config.get('CATEGORY_REGISTRY_MAX_AGE', self.max_age)
+
+    def invalidate(self):
+        with self._lock:
+            self._icons = None
+
+    def icons(self):
+        """
+        {name: icon_key} for every category, as of the current 'categories' data_version (do not modify the returned
+        dict). Costs one primary key lookup when nothing changed: GET /api/items/categories sends these under an ETag
+        built from that version, so they must not be older than it.
+        """
+        icons = self._icons
+        if icons is None or self._expired() or self._version != current_version(CATEGORIES):
+            icons = self._load()
+        return icons
+
+    def resolve(self, names):
+        """{name: icon_key} for the given names in one lookup; names that don't exist are left out"""
+        icons = self._cached()
+        if any(name not in icons for name in names):
+            icons = self._load()  # someone else may have just created it
+        return {name: icons[name] for name in names if name in icons}
+
+    def icon_for(self, name):
+        return self.resolve([name]).get(name)
+
+    def ensure(self, names):
+        """
+        Make sure every category in names exists, creating all missing ones with one bulk upsert
+        (no query at all when they are already known). Runs in the caller's transaction.
+        """
+        known = self.resolve(names)
+        missing = [name for name in names if name not in known]
+        if missing:
+            bulk_upsert_categories({name: None for name in missing})
+            self.invalidate()
+        return missing
+
+    def _expired(self):
+        return time.monotonic() - self._loaded_at > self.max_age
+
+    def _cached(self):
+        """The loaded map (no version check), reloaded first if there is none yet or it is older than max_age"""
+        icons = self._icons
+        if icons is None or self._expired():
+            icons = self._load()
+        return icons
+
+    def _load(self):
+        """
+        SELECT version FROM data_version WHERE name = 'categories';
+        SELECT name, icon_key FROM category;
+        """
+        # Version first: a write landing in between leaves us with newer rows under an older version (reloaded again
+        # on the next icons() call), never the other way round
+        version = current_version(CATEGORIES)
+        icons = {name: icon_key for name, icon_key in db.session.query(Category.name, Category.icon_key)}
+        with self._lock:
+            self._icons = icons
+            self._version = version
+            self._loaded_at = time.monotonic()
+        return icons
+
+
+category_registry = CategoryRegistry()
+
+
+def bulk_upsert_categories(icons):
+    """
+    Make sure every category in icons ({name: icon_key or None}) exists, using at most two statements.
+    Names with an icon_key are inserted or have their icon replaced; names with None are only inserted if missing
+    (with the default icon), so naming a category never resets an icon that was set earlier.
+    Runs in the caller's transaction; the caller commits.
+    """
+    with_icon = [{'name': name, 'icon_key': icon} for name, icon in icons.items() if icon]
+    without_icon = [{'name': name, 'icon_key': DEFAULT_ICON_KEY} for name, icon in icons.items() if not icon]
+    if with_icon:
+        _upsert(with_icon, update_icons=True)
+    if without_icon:
+        _upsert(without_icon, update_icons=False)
+
+
+def _upsert(rows, update_icons):
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(Category).values(rows)
+        if update_icons:
+            stmt = stmt.on_duplicate_key_update(icon_key=stmt.inserted.icon_key)
+        else:
+            stmt = stmt.on_duplicate_key_update(name=stmt.inserted.name)  # no-op update == "insert if missing"
+        db.session.execute(stmt)
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(Category).values(rows)
+        if update_icons:
+            stmt = stmt.on_conflict_do_update(index_elements=['name'], set_={'icon_key': stmt.excluded.icon_key})
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['name'])
+        db.session.execute(stmt)
+    else:
+        # Portable fallback: look up which names exist, insert the rest, then fix up icons one by one
+        names = [row['name'] for row in rows]
+        existing = {name for (name,) in db.session.query(Category.name).filter(Category.name.in_(names))}
+        missing = [row for row in rows if row['name'] not in existing]
+        if missing:
+            db.session.execute(db.insert(Category), missing)
+        if update_icons:
+            for row in rows:
+                if row['name'] in existing:
+                    db.session.execute(
+                        db.update(Category).where(Category.name == row['name']).values(icon_key=row['icon_key'])
+                    )
@@ -0,0 +1,112 @@
+import datetime
+import zlib
+from functools import wraps
+from flask import request, make_response, g
+from flask_login import current_user
+from sqlalchemy import update
+from sqlalchemy.dialects import mysql, sqlite
+from models import db, DataVersion
+
+# HTTP conditional GET support (ETag / Last-Modified -> 304 Not Modified).
+# Instead of hashing response bodies, every write path bumps a small version counter in the data_version table
+# (in the same transaction as the write). A read endpoint names the scopes its data depends on, and the validators
+# are built from those counters, so deciding "has anything changed?" is a single primary-key lookup.
+"""
+SELECT name, version, updated_at FROM data_version WHERE name IN (:scopes);
+
+-- bump (inside the writer's transaction, one statement for all scopes)
+INSERT INTO data_version (name, version, updated_at) VALUES (:scope1, 1, :now), (:scope2, 1, :now), ...
+ON DUPLICATE KEY UPDATE version = version + 1, updated_at = VALUES(updated_at);   -- SQLite: ON CONFLICT (name) DO UPDATE
+"""
+
+# Scopes used by the routes
+ITEMS = 'items'            # item rows, their categories, star ratings and review counts
+CATEGORIES = 'categories'  # category rows
+REVIEWS = 'reviews'        # review rows
+PRICES = 'prices'          # which items exist in which category, and their prices (item inserts / repricing)
+FOLLOWS = 'follows'        # follow rows
+SUGGESTIONS = 'follow_suggestions'  # follow_suggestion rows (batch rebuilt)
+
+
+def bump_version(*scopes):
+    """Mark scopes as changed. Call before db.session.commit() so the bump is part of the write's transaction."""
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    # An upsert, so the first bump of a scope can't race another writer's first bump into a duplicate key error
+    table = DataVersion.__table__
+    rows = [{'name': scope, 'version': 1, 'updated_at': now} for scope in dict.fromkeys(scopes)]
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update(version=table.c.version + 1, updated_at=stmt.inserted.updated_at)
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'], set_={'version': table.c.version + 1, 'updated_at': stmt.excluded.updated_at}
+        )
+    else:
+        for row in rows:
+            result = db.session.execute(
+                update(table).where(table.c.name == row['name']).values(version=table.c.version + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                db.session.execute(table.insert().values(row))
+        return
+    db.session.execute(stmt)
+
+
+def current_version(scope):
+    """The scope's current version number (0 if it has never been bumped)"""
+    return db.session.query(DataVersion.version).filter(DataVersion.name == scope).scalar() or 0
+
+
+def conditional_get(*scopes):
+    """
+    Route decorator that answers If-None-Match / If-Modified-Since with a bare 304 when none of the given scopes
+    have changed, and otherwise adds ETag and Last-Modified headers to the view's response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            rows = db.session.query(DataVersion.name, DataVersion.version, DataVersion.updated_at) \
+                .filter(DataVersion.name.in_(scopes)).all()
+            versions = {name: (version, updated_at) for name, version, updated_at in rows}
+
+            # The same scopes back many URLs (query strings, per-user pages), so fold the URL and user into the tag
+            variant = request.full_path
+            if current_user.is_authenticated:
+                variant += '|' + current_user.get_id()
+            scope_versions = '-'.join(f'{scope}{versions.get(scope, (0, None))[0]}' for scope in scopes)
+            etag = scope_versions + '-' + format(zlib.crc32(variant.encode('utf-8')), '08x')
+            # response_cache.cached (stacked inside us) adds this to its key, so a body cached under older versions
+            # (by another worker, or before a writer's invalidate() ran) is never sent out with this ETag
+            g.data_versions = scope_versions
+            stamps = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+            last_modified = max(stamps).replace(tzinfo=datetime.timezone.utc) if stamps else None
+            # Stamps only have one-second resolution, so a stamp from the current second may still be followed by
+            # another write with the same stamp: don't hand it out as Last-Modified, nor honour it in If-Modified-Since
+            this_second = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+            if last_modified and last_modified >= this_second:
+                last_modified = None
+
+            # If-None-Match wins when both are sent (RFC 9110)
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = bool(last_modified and request.if_modified_since
+                                    and last_modified <= request.if_modified_since)
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True  # browsers may keep a copy but must revalidate it with us first
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,184 @@
+from flask import current_app
+from sqlalchemy import union
+from models import db, Item, Follow, TimelineEntry
+from utils.follow_graph import follow_graph
+from utils.pagination import CursorError, parse_limit, encode_cursor, decode_cursor
+
+# Following feed (GET /api/follow/feed): items posted by the users you follow, newest (highest item id) first.
+# Fan-out-on-write: create_item copies the new item into the timeline_entry rows of every follower of the poster with
+# one INSERT ... SELECT FROM follow, so reading a feed page is a range scan of the reader's own primary key range.
+# Sellers with more than FEED_FANOUT_MAX_FOLLOWERS followers are skipped at write time (one post would be that many
+# rows); their items are merged in when the feed is read instead (fan-out-on-read), straight from the item table.
+# Whether a seller is fanned out is decided from their current follower count (in-memory follow graph), and the follow
+# routes (single and bulk) keep timelines consistent with it: following a fanned-out seller backfills their items,
+# unfollowing removes them, and a seller dropping back under the limit has their items fanned out to every follower again.
+# rebuild_timelines() recomputes every timeline from follow + item (`flask rebuild-feeds`, and after bulk imports).
+"""
+-- fan_out_item
+INSERT INTO timeline_entry (follower_username, item_id, posted_by)
+SELECT follower_username, :item_id, :posted_by FROM follow WHERE user_username = :posted_by;
+
+-- feed_page (pulled sellers only when the reader follows any)
+SELECT item.* FROM item JOIN (
+    SELECT item_id AS id FROM (SELECT item_id FROM timeline_entry WHERE follower_username = :me AND item_id < :last_id
+                               ORDER BY item_id DESC LIMIT :limit_plus_one)
+    UNION
+    SELECT id FROM (SELECT id FROM item WHERE posted_by IN (:pulled_sellers) AND id < :last_id
+                    ORDER BY id DESC LIMIT :limit_plus_one)
+) feed ON feed.id = item.id
+ORDER BY item.id DESC;
+"""
+
+DEFAULT_FANOUT_MAX_FOLLOWERS = 1000
+
+
+def fanout_max_followers():
+    return current_app.config.get('FEED_FANOUT_MAX_FOLLOWERS', DEFAULT_FANOUT_MAX_FOLLOWERS)
+
+
+def _follower_count(username):
+    follow_graph.ensure_current()
+    return follow_graph.degree(username)['followers']
+
+
+def is_fanned_out(username):
+    """True if username's new items are written into their followers' timelines (False: read from item instead)"""
+    return _follower_count(username) <= fanout_max_followers()
+
+
+def _copy_items(follower_query):
+    """INSERT INTO timeline_entry every (follower, item) pair selected by follower_query that isn't there yet"""
+    existing = (
+        db.select(TimelineEntry.item_id)
+        .where(TimelineEntry.follower_username == follower_query.selected_columns[0],
+               TimelineEntry.item_id == follower_query.selected_columns[1])
+        .exists()
+    )
+    db.session.execute(
+        TimelineEntry.__table__.insert().from_select(
+            ['follower_username', 'item_id', 'posted_by'], follower_query.where(~existing)
+        )
+    )
+
+
+# Write paths (run in the caller's transaction; the caller commits)
+
+def fan_out_item(item):
+    """Push a newly created item into its poster's followers' timelines (unless the poster has too many followers)"""
+    if not is_fanned_out(item.posted_by):
+        return
+    followers = db.select(Follow.follower_username, db.literal(item.id), db.literal(item.posted_by)).where(
+        Follow.user_username == item.posted_by
+    )
+    db.session.execute(
+        TimelineEntry.__table__.insert().from_select(['follower_username', 'item_id', 'posted_by'], followers)
+    )
+
+
+def on_follow(follower, followees):
+    """Backfill the followees' items into follower's timeline. Call before committing the new follow rows."""
+    # The follow graph doesn't include the new follows yet, hence the + 1
+    fanned_out = [name for name in followees if _follower_count(name) + 1 <= fanout_max_followers()]
+    if fanned_out:
+        _copy_items(
+            db.select(db.literal(follower).label('follower_username'), Item.id, Item.posted_by)
+            .where(Item.posted_by.in_(fanned_out))
+        )
+
+
+def on_unfollow(follower, followees):
+    """Drop the followees' items from follower's timeline. Call before committing the removed follow rows."""
+    db.session.execute(
+        TimelineEntry.__table__.delete().where(
+            TimelineEntry.follower_username == follower, TimelineEntry.posted_by.in_(followees)
+        )
+    )
+    # The follow graph still counts the removed follows. A followee who is now back under the fan-out limit has
+    # their items (which were read-time only until now) copied into the timelines of their remaining followers.
+    back_under = [name for name in followees if _follower_count(name) - 1 == fanout_max_followers()]
+    if back_under:
+        _copy_items(
+            db.select(Follow.follower_username, Item.id, Item.posted_by)
+            .join(Item, Item.posted_by == Follow.user_username)
+            .where(Follow.user_username.in_(back_under), Follow.follower_username != follower)
+        )
+
+
+def delete_timelines(username):
+    """Remove username's own timeline and their items from everyone else's (call before deleting the user)"""
+    db.session.execute(TimelineEntry.__table__.delete().where(
+        (TimelineEntry.follower_username == username) | (TimelineEntry.posted_by == username)
+    ))
+
+
+def rebuild_timelines():
+    """
+    Recompute every timeline from the follow and item tables. Runs in the caller's transaction; the caller commits.
+        DELETE FROM timeline_entry;
+        INSERT INTO timeline_entry SELECT f.follower_username, i.id, i.posted_by
+        FROM follow f JOIN item i ON i.posted_by = f.user_username
+        WHERE f.user_username IN (SELECT user_username FROM follow GROUP BY user_username HAVING COUNT(*) <= :max);
+    """
+    db.session.execute(TimelineEntry.__table__.delete())
+    fanned_out = (
+        db.select(Follow.user_username)
+        .group_by(Follow.user_username)
+        .having(db.func.count() <= fanout_max_followers())
+    )
+    pairs = (
+        db.select(Follow.follower_username, Item.id, Item.posted_by)
+        .join(Item, Item.posted_by == Follow.user_username)
+        .where(Follow.user_username.in_(fanned_out))
+    )
+    db.session.execute(
+        TimelineEntry.__table__.insert().from_select(['follower_username', 'item_id', 'posted_by'], pairs)
+    )
+
+
+# Read path
+
+def feed_page(username, raw_limit, cursor):
+    """
+    One page of username's feed from the ?limit= and ?cursor= params: (items, next_cursor, limit), items newest first.
+    Raises CursorError for a bad limit or cursor.
+    """
+    limit = parse_limit(raw_limit)
+    last_id = None
+    if cursor:
+        values = decode_cursor(cursor, 'feed')
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise CursorError('Invalid cursor')
+        last_id = values[0]
+
+    follow_graph.ensure_current()
+    max_followers = fanout_max_followers()
+    pulled = sorted(name for name in follow_graph.following(username)
+                    if follow_graph.degree(name)['followers'] > max_followers)
+
+    # Each branch is cut to limit + 1 rows on its own index before the two are merged
+    pushed = db.select(TimelineEntry.item_id.label('id')).where(TimelineEntry.follower_username == username)
+    if last_id is not None:
+        pushed = pushed.where(TimelineEntry.item_id < last_id)
+    branches = [pushed.order_by(TimelineEntry.item_id.desc()).limit(limit + 1).subquery()]
+    if pulled:
+        read_time = db.select(Item.id).where(Item.posted_by.in_(pulled))
+        if last_id is not None:
+            read_time = read_time.where(Item.id < last_id)
+        branches.append(read_time.order_by(Item.id.desc()).limit(limit + 1).subquery())
+    if len(branches) > 1:
+        feed_ids = union(*(db.select(branch.c.id) for branch in branches)).subquery()
+    else:
+        feed_ids = branches[0]
+
+    items = (
+        Item.query
+        .join(feed_ids, feed_ids.c.id == Item.id)
+        .order_by(Item.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor('feed', (items[-1].id,))
+    return items, next_cursor, limit
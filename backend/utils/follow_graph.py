@@ -0,0 +1,226 @@
+import threading
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, Follow
+from utils.conditional import current_version, FOLLOWS
+
+# In-memory follow graph for the social queries (mutual follows, "followed by any of", follower counts).
+# Usernames are mapped to small integer ids and each direction of the follow table is packed into a CSR
+# (compressed sparse row) structure: one flat array of neighbour ids, sorted per user, plus an offsets array, so
+# user i's neighbours are targets[offsets[i]:offsets[i + 1]]. That is a few machine words per edge instead of an ORM
+# object, and every lookup is a slice. The arrays are numpy int64 arrays, built the same way as the adjacency matrix
+# in utils/recommendations.py (sort the edges, count them per node, prefix-sum the counts).
+#
+# The follow routes (single and bulk) apply their edges to a small overlay (added / removed edges) after they commit;
+# the overlay is folded into fresh arrays once it grows past COMPACT_AFTER edits.
+# The graph remembers the 'follows' data_version it reflects. Writes in this process advance it by one together with
+# the DB, so when another worker process changes the follow table the numbers no longer line up and the next query
+# rebuilds the graph from the database (one two-column SELECT).
+"""
+SELECT follower_username, user_username FROM follow;
+"""
+
+COMPACT_AFTER = 1024
+
+
+def _edge_array(values, count):
+    return np.fromiter(values, dtype=np.int64, count=count)
+
+
+class _CSR:
+    """Sorted neighbour lists of nodes 0..n-1 packed into two flat arrays"""
+
+    def __init__(self, n, sources, targets):
+        # sources, targets: int64 arrays of the edges' endpoints, in any order
+        order = np.lexsort((targets, sources))
+        self.targets = targets[order]
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=self.offsets[1:])
+
+    def neighbours(self, node):
+        if node + 1 >= len(self.offsets):
+            return []
+        return self.targets[self.offsets[node]:self.offsets[node + 1]].tolist()
+
+    def degree(self, node):
+        if node + 1 >= len(self.offsets):
+            return 0
+        return int(self.offsets[node + 1] - self.offsets[node])
+
+    def has(self, node, target):
+        if node + 1 >= len(self.offsets):
+            return False
+        lo, hi = self.offsets[node], self.offsets[node + 1]
+        i = lo + np.searchsorted(self.targets[lo:hi], target)
+        return bool(i < hi and self.targets[i] == target)
+
+
+class FollowGraph:
+
+    def __init__(self):
+        self.version = None      # 'follows' data_version the graph reflects (None = not built yet)
+        self._ids = {}           # username -> id
+        self._names = []         # id -> username
+        self._following = _CSR(0, _edge_array((), 0), _edge_array((), 0))  # follower id -> ids of users they follow
+        self._followers = _CSR(0, _edge_array((), 0), _edge_array((), 0))  # user id -> ids of their followers
+        # Overlay of edges changed since the arrays were packed, indexed both ways: node id -> set of node ids
+        self._added_out, self._added_in = {}, {}      # follows not in the arrays yet
+        self._removed_out, self._removed_in = {}, {}  # follows in the arrays that have since been deleted
+        self._edits = 0
+        self._lock = threading.RLock()
+
+    # Building / keeping current
+
+    def init_app(self, app):
+        """Build the graph when the worker starts (FOLLOW_GRAPH_PRELOAD), instead of on the first query"""
+        if not app.config.get('FOLLOW_GRAPH_PRELOAD', True):
+            return
+        with app.app_context():
+            try:
+                self.rebuild()
+            except SQLAlchemyError as e:  # e.g. tables not created yet; the first query will build it instead
+                app.logger.warning('Follow graph not preloaded (%s); it will be built on first use', type(e).__name__)
+
+    def rebuild(self):
+        """Load the whole follow table and rebuild the arrays (worker startup, or after another process wrote)"""
+        version = current_version(FOLLOWS)
+        rows = db.session.query(Follow.follower_username, Follow.user_username).all()
+        with self._lock:
+            self._ids, self._names = {}, []
+            sources = _edge_array((self._id(follower) for follower, _ in rows), len(rows))
+            targets = _edge_array((self._id(followee) for _, followee in rows), len(rows))
+            self._pack(sources, targets)
+            self.version = version
+
+    def ensure_current(self):
+        """Rebuild if the follow table has changed since the graph was built (one primary-key lookup otherwise)"""
+        if self.version != current_version(FOLLOWS):
+            self.rebuild()
+
+    def add(self, follower, *followees):
+        """Record follows this process has just committed (together with one bump of the 'follows' version)"""
+        with self._lock:
+            source = self._id(follower)
+            for followee in followees:
+                target = self._id(followee)
+                if target in self._removed_out.get(source, ()):
+                    self._unlink(self._removed_out, self._removed_in, source, target)
+                elif not self._following.has(source, target):
+                    self._link(self._added_out, self._added_in, source, target)
+            self._committed(len(followees))
+
+    def remove(self, follower, *followees):
+        """Record unfollows this process has just committed (together with one bump of the 'follows' version)"""
+        with self._lock:
+            source = self._id(follower)
+            for followee in followees:
+                target = self._id(followee)
+                if target in self._added_out.get(source, ()):
+                    self._unlink(self._added_out, self._added_in, source, target)
+                elif self._following.has(source, target):
+                    self._link(self._removed_out, self._removed_in, source, target)
+            self._committed(len(followees))
+
+    # Queries (call ensure_current() first)
+
+    def following(self, username):
+        """Set of usernames username follows"""
+        with self._lock:
+            return {self._names[i] for i in self._out(self._ids.get(username))}
+
+    def followers(self, username):
+        """Set of usernames following username"""
+        with self._lock:
+            return {self._names[i] for i in self._in(self._ids.get(username))}
+
+    def followed_by_all(self, usernames):
+        """Sorted usernames followed by every one of usernames (k-way intersection, smallest list first)"""
+        with self._lock:
+            ids = [self._ids.get(name) for name in usernames]
+            if not ids or None in ids:
+                return []
+            ids.sort(key=self._out_degree)
+            common = self._out(ids[0])
+            for node in ids[1:]:
+                if not common:
+                    break
+                common &= self._out(node)
+            return sorted(self._names[i] for i in common)
+
+    def followed_by_any(self, usernames):
+        """Sorted usernames followed by at least one of usernames (union)"""
+        with self._lock:
+            union = set()
+            for name in usernames:
+                union |= self._out(self._ids.get(name))
+            return sorted(self._names[i] for i in union)
+
+    def degree(self, username):
+        """{'followers': n, 'following': m} for username"""
+        with self._lock:
+            node = self._ids.get(username)
+            if node is None:
+                return {'followers': 0, 'following': 0}
+            return {'followers': self._in_degree(node), 'following': self._out_degree(node)}
+
+    # Internals (caller holds the lock)
+
+    def _id(self, username):
+        node = self._ids.get(username)
+        if node is None:
+            node = self._ids[username] = len(self._names)
+            self._names.append(username)
+        return node
+
+    def _out(self, node):
+        if node is None:
+            return set()
+        result = set(self._following.neighbours(node))
+        result.difference_update(self._removed_out.get(node, ()))
+        result.update(self._added_out.get(node, ()))
+        return result
+
+    def _in(self, node):
+        if node is None:
+            return set()
+        result = set(self._followers.neighbours(node))
+        result.difference_update(self._removed_in.get(node, ()))
+        result.update(self._added_in.get(node, ()))
+        return result
+
+    def _out_degree(self, node):
+        return (self._following.degree(node)
+                + len(self._added_out.get(node, ())) - len(self._removed_out.get(node, ())))
+
+    def _in_degree(self, node):
+        return (self._followers.degree(node)
+                + len(self._added_in.get(node, ())) - len(self._removed_in.get(node, ())))
+
+    @staticmethod
+    def _link(out, into, source, target):
+        out.setdefault(source, set()).add(target)
+        into.setdefault(target, set()).add(source)
+
+    @staticmethod
+    def _unlink(out, into, source, target):
+        out[source].discard(target)
+        into[target].discard(source)
+
+    def _pack(self, sources, targets):
+        n = len(self._names)
+        self._following = _CSR(n, sources, targets)
+        self._followers = _CSR(n, targets, sources)
+        self._added_out, self._added_in = {}, {}
+        self._removed_out, self._removed_in = {}, {}
+        self._edits = 0
+
+    def _committed(self, edits):
+        if self.version is not None:
+            self.version += 1
+        self._edits += edits
+        if self._edits > COMPACT_AFTER:
+            edges = [(s, t) for s in range(len(self._names)) for t in self._out(s)]
+            self._pack(_edge_array((s for s, _ in edges), len(edges)), _edge_array((t for _, t in edges), len(edges)))
+
+
+follow_graph = FollowGraph()
@@ -0,0 +1,149 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import g
+from models import db, User
+
+# Background report jobs (POST /api/reports/jobs, then poll GET /api/reports/jobs/<id>).
+# A report request normally holds a Flask worker for as long as its query runs; as a job it is handed to a small,
+# bounded thread pool instead and the request returns immediately. Each job replays a GET of the report's own URL in a
+# request context of its own (so it has its own app context and therefore its own DB session, which Flask-SQLAlchemy
+# removes when the context ends), with the submitting user logged in for @login_required. It goes through
+# full_dispatch_request(), so the app's and blueprint's before/after_request hooks (e.g. report profiling) run as
+# they would for the same request over HTTP.
+# A job belongs to the user who submitted it: only they can read it, and identical jobs (same user + report + params)
+# are deduplicated while they are queued/running. Finished results are kept for a TTL, so repeated submissions are
+# served from the finished job instead of re-running the query.
+# Like the response cache, jobs live in the memory of the worker process that accepted them.
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when max_pending jobs are already queued or running"""
+
+
+class ReportJob:
+
+    def __init__(self, report, endpoint, params, username):
+        self.id = uuid.uuid4().hex
+        self.report = report
+        self.endpoint = endpoint
+        self.params = params
+        self.username = username
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def key(self):
+        return (self.username, self.report, tuple(sorted(self.params.items())))
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'report': self.report,
+            'params': self.params,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == DONE:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+class ReportJobQueue:
+    """Bounded thread pool for report jobs, configured from app.config like our other extensions"""
+
+    def __init__(self, workers=2, max_pending=32, ttl=300):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.app = None
+        self._executor = None
+        self._jobs = {}       # job id -> ReportJob
+        self._by_key = {}     # (report, params) -> job id of the newest job for it
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('REPORT_JOB_WORKERS', self.workers)
+        self.max_pending = app.config.get('REPORT_JOB_MAX_PENDING', self.max_pending)
+        self.ttl = app.config.get('REPORT_JOB_TTL', self.ttl)
+
+    def submit(self, report, endpoint, params, username):
+        """
+        Queue a job for the report (endpoint is its view, e.g. 'reports.top_posters'), or return username's existing
+        job if an identical one is queued, running, or finished less than ttl seconds ago.
+        Returns (job, created). Raises JobQueueFull when max_pending jobs are already waiting or running.
+        """
+        job = ReportJob(report, endpoint, params, username)
+        with self._lock:
+            self._purge()
+            existing = self._jobs.get(self._by_key.get(job.key))
+            if existing is not None and existing.status != FAILED:
+                return existing, False
+            if sum(1 for j in self._jobs.values() if j.status in (QUEUED, RUNNING)) >= self.max_pending:
+                raise JobQueueFull(f'{self.max_pending} report jobs are already pending')
+            self._jobs[job.id] = job
+            self._by_key[job.key] = job.id
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-job')
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id, username):
+        """username's job with this id (None if there is none, it expired, or it was submitted by someone else)"""
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            return job if job is not None and job.username == username else None
+
+    def stats(self):
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {'workers': self.workers, 'max_pending': self.max_pending, 'ttl_seconds': self.ttl, 'jobs': counts}
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            path = self.app.url_map.bind('localhost').build(job.endpoint)
+            with self.app.test_request_context(path, query_string=job.params):
+                g._login_user = db.session.get(User, job.username)  # Flask-Login's current_user for this context
+                response = self.app.full_dispatch_request()
+                # JSON reports are stored as data; csv/ndjson exports as their text
+                payload = response.get_json() if response.is_json else response.get_data(as_text=True)
+            if response.status_code == 200:
+                job.result = payload
+                job.status = DONE
+            else:
+                error = payload.get('error') if isinstance(payload, dict) else None
+                job.error = error or f'Report returned HTTP {response.status_code}'
+                job.status = FAILED
+        except Exception as e:
+            job.error = f'{e.__class__.__name__}: {e}'
+            job.status = FAILED
+        job.finished_at = time.time()
+
+    def _purge(self):
+        # Caller must hold the lock. Drops finished jobs older than the TTL.
+        cutoff = time.time() - self.ttl
+        expired = [job for job in self._jobs.values() if job.finished_at is not None and job.finished_at < cutoff]
+        for job in expired:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+
+
+report_jobs = ReportJobQueue()
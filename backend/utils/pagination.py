@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import and_, or_, func
+
+# Helpers for keyset ("cursor") pagination.
+# Instead of OFFSET (which makes the database walk past every skipped row), each page remembers the sort
+# value and id of its last row. The next page then asks for rows "after" that pair, which an index on
+# (sort_column, id) can answer directly no matter how deep into the results we are.
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class CursorError(ValueError):
+    """Raised when a client sends a cursor we can't decode (tampered, truncated, or for a different sort)"""
+
+
+def parse_limit(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Turn the ?limit= query param into a page size between 1 and maximum"""
+    if raw is None or raw == '':
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise CursorError('limit must be an integer')
+    return max(1, min(limit, maximum))
+
+
+def _to_json_value(value):
+    # Dates and Decimals aren't JSON serializable, so store them as strings and rebuild them on decode
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(sort_key, values):
+    """Pack the sort key and the last row's (sort_value, id) into an opaque, URL-safe string"""
+    payload = json.dumps({'s': sort_key, 'v': [_to_json_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_key):
+    """Unpack a cursor made by encode_cursor(). The cursor must have been issued for the same sort key."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        values = payload['v']
+    except (ValueError, KeyError, TypeError):
+        raise CursorError('Invalid cursor')
+    if payload.get('s') != sort_key or not isinstance(values, list):
+        raise CursorError('Cursor does not match the requested sort')
+    return values
+
+
+def keyset_filter(columns, values, descending):
+    """
+    Build the "comes after this row" predicate for a multi-column sort, e.g. for (price, id) descending:
+        price < :price OR (price = :price AND id < :id)
+    Written as expanded OR/AND instead of a row-value comparison so MySQL can use the index for it.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def prefix_like(column, prefix):
+    """
+    column LIKE '<prefix>%', with LIKE wildcards in prefix escaped. Written as a constant pattern (not a
+    concatenation) so an index on column can answer it as a range scan.
+    """
+    escaped = prefix.replace('/', '//').replace('%', '/%').replace('_', '/_')
+    return column.like(escaped + '%', escape='/')
+
+
+def name_page(query, column, cursor_key, raw_limit, cursor, count_total=True):
+    """
+    One keyset page of a query ordered by a single unique text column (e.g. username), from the ?limit= and
+    ?cursor= params. Returns (rows, next_cursor, limit, total), where rows[i][0] must be the column's value.
+    total (number of matching rows) is only counted on the first page, and is None when a cursor is given
+    (or count_total is False, e.g. because the caller has a maintained count).
+    Raises CursorError for a bad limit or cursor.
+    """
+    limit = parse_limit(raw_limit)
+    total = None
+    if cursor:
+        values = decode_cursor(cursor, cursor_key)
+        if len(values) != 1 or not isinstance(values[0], str):
+            raise CursorError('Invalid cursor')
+        query = query.filter(keyset_filter((column,), values, descending=False))
+    elif count_total:
+        total = query.order_by(None).with_entities(func.count(column)).scalar()
+
+    # Fetch one extra row so we know whether there is another page
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(cursor_key, (rows[-1][0],))
+    return rows, next_cursor, limit, total
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import deque
+from flask import g, request, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from models import db
+
+# Opt-in query profiling for the report endpoints (REPORT_PROFILING=1, read back by administrators at GET
+# /api/reports/_profile).
+# While a profiled request runs, SQLAlchemy's cursor events count its SQL statements, time spent in the database and
+# rows fetched. When the request ends (after a streamed export has finished, too) the numbers are added to a sliding
+# window of the last `window` requests per report, and read back as p50/p95/p99.
+# The first time a SELECT is seen its EXPLAIN plan is captured on a separate connection (with the parameters it actually
+# ran with) and cached by statement text, so later requests cost nothing extra.
+# Rows fetched come from the driver's cursor.rowcount: PyMySQL buffers SELECT results so it knows the count, while
+# drivers that do not (e.g. SQLite, which reports -1) contribute 0.
+# Like the response cache, the numbers live in the memory of each worker process.
+
+PERCENTILES = (50, 95, 99)
+EXPLAIN_PREFIX = {'mysql': 'EXPLAIN ', 'mariadb': 'EXPLAIN ', 'sqlite': 'EXPLAIN QUERY PLAN ', 'postgresql': 'EXPLAIN '}
+
+
+def _is_select(statement):
+    return statement.lstrip()[:6].upper().startswith(('SELECT', 'WITH'))
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))  # ceil(pct / 100 * n)
+    return sorted_values[rank - 1]
+
+
+class QueryProfiler:
+    """Per-report SQL statistics and cached EXPLAIN plans, configured from app.config like our other extensions"""
+
+    def __init__(self, window=1000, max_plans=256):
+        self.enabled = False
+        self.window = window          # requests kept per report
+        self.max_plans = max_plans    # distinct statements whose plan we keep
+        self._samples = {}            # report -> deque of (duration_ms, statements, db_ms, rows)
+        self._statements = {}         # report -> statement texts seen for it (in first-seen order)
+        self._plans = {}              # statement text -> EXPLAIN rows (or {'error': ...})
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('REPORT_PROFILING', self.enabled)
+        self.window = app.config.get('REPORT_PROFILE_WINDOW', self.window)
+        if not event.contains(Engine, 'before_cursor_execute', self._before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def profile_blueprint(self, blueprint, exclude=()):
+        """Profile every request to blueprint's endpoints (except the view function names in exclude)"""
+        @blueprint.before_request
+        def _start_profile():
+            if self.enabled and request.endpoint.rsplit('.', 1)[-1] not in exclude:
+                g._query_profile = {'start': time.perf_counter(), 'statements': 0, 'db_time': 0.0, 'rows': 0,
+                                    'seen': {}}  # statement text -> parameters of its first run
+
+        @blueprint.teardown_request
+        def _finish_profile(exc):
+            profile = g.pop('_query_profile', None)
+            if profile is not None:
+                self._record(request.endpoint.split('.', 1)[-1], profile)
+
+    # Reading / resetting
+
+    def stats(self, plans=False):
+        """{report: {requests, duration_ms, db_ms, statements: {p50, p95, p99}, rows, ...}} for every profiled report"""
+        with self._lock:
+            samples = {report: list(window) for report, window in self._samples.items()}
+            statements = {report: list(texts) for report, texts in self._statements.items()}
+            cached_plans = dict(self._plans)
+        reports = {}
+        for report, rows in sorted(samples.items()):
+            entry = {'requests': len(rows)}
+            for i, name in enumerate(('duration_ms', 'statements', 'db_ms', 'rows')):
+                values = sorted(row[i] for row in rows)
+                entry[name] = {f'p{pct}': percentile(values, pct) for pct in PERCENTILES}
+                entry[name]['max'] = values[-1]
+            if plans:
+                entry['plans'] = [{'statement': text, 'plan': cached_plans.get(text)} for text in statements[report]]
+            reports[report] = entry
+        return {'enabled': self.enabled, 'window': self.window, 'reports': reports}
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._statements.clear()
+            self._plans.clear()
+
+    # Internals
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_app_context() and g.get('_query_profile') is not None:
+            conn.info.setdefault('_profile_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        profile = g.get('_query_profile') if has_app_context() else None
+        starts = conn.info.get('_profile_start')
+        if profile is None or not starts:
+            return
+        profile['db_time'] += time.perf_counter() - starts.pop()
+        profile['statements'] += 1
+        if _is_select(statement):
+            profile['rows'] += max(cursor.rowcount, 0)
+            if not executemany:
+                profile['seen'].setdefault(statement, parameters)
+
+    def _record(self, report, profile):
+        duration_ms = (time.perf_counter() - profile['start']) * 1000
+        sample = (round(duration_ms, 3), profile['statements'], round(profile['db_time'] * 1000, 3), profile['rows'])
+        with self._lock:
+            self._samples.setdefault(report, deque(maxlen=self.window)).append(sample)
+            seen = self._statements.setdefault(report, [])
+            seen.extend(text for text in profile['seen'] if text not in seen)
+            unexplained = [(text, params) for text, params in profile['seen'].items() if text not in self._plans]
+        # EXPLAIN runs after g._query_profile is gone, so these statements are not counted against the report
+        for text, parameters in unexplained:
+            if len(self._plans) >= self.max_plans:
+                break
+            plan = self._explain(text, parameters)
+            with self._lock:
+                self._plans.setdefault(text, plan)
+
+    @staticmethod
+    def _explain(statement, parameters):
+        prefix = EXPLAIN_PREFIX.get(db.engine.dialect.name)
+        if prefix is None:
+            return {'error': f'EXPLAIN is not supported for {db.engine.dialect.name}'}
+        try:
+            with db.engine.connect() as conn:
+                result = conn.exec_driver_sql(prefix + statement, parameters)
+                return [dict(row._mapping) for row in result]
+        except SQLAlchemyError as e:
+            return {'error': f'{e.__class__.__name__}: {e.orig if getattr(e, "orig", None) else e}'}
+
+
+query_profiler = QueryProfiler()
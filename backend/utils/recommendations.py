@@ -0,0 +1,182 @@
+import time
+import numpy as np
+from flask import current_app
+from models import db, User, Item, Follow, FollowSuggestion, item_category
+from utils.conditional import bump_version, SUGGESTIONS
+
+# "People you may know": for every user, the sellers they don't follow yet, ranked by
+#     score = mutual_follows + category_weight * category_score
+# mutual_follows counts friends-of-friends paths (how many of the people you follow follow them), i.e. row u of A @ A
+# for the follow adjacency matrix A. category_score is the cosine similarity between your category interests (the
+# categories you post in, plus those of the sellers you follow) and the categories the candidate posts in.
+# Scoring every pair is far too slow per request, so rebuild_follow_suggestions() runs as a batch job
+# (`flask rebuild-follow-suggestions`, e.g. nightly from cron). It loads the follow graph into CSR arrays, computes
+# both terms with vectorized numpy operations a chunk of users at a time, and stores each user's top K in
+# follow_suggestion. GET /api/follow/suggestions then only reads the stored rows.
+"""
+-- inputs
+SELECT username FROM user ORDER BY username;
+SELECT follower.username, followee.username FROM follow f
+JOIN user follower ON follower.username = f.follower_username JOIN user followee ON followee.username = f.user_username;
+SELECT u.username, LOWER(ic.category_name), COUNT(*) FROM user u
+JOIN item i ON i.posted_by = u.username JOIN item_category ic ON ic.item_id = i.id
+GROUP BY u.username, LOWER(ic.category_name);
+
+-- output (one transaction)
+DELETE FROM follow_suggestion;
+INSERT INTO follow_suggestion (username, rank, suggested_username, score, mutual_follows, category_score)
+VALUES (...), (...), ...;
+"""
+
+DEFAULT_TOP_K = 20
+DEFAULT_CATEGORY_WEIGHT = 2.0
+CHUNK_CELLS = 4_000_000   # (users in a chunk) x (sellers) scored at once: ~16 MB per float32 matrix
+INSERT_BATCH_SIZE = 1000
+
+
+def _ranges(starts, lengths):
+    """Concatenation of arange(s, s + l) for every (s, l) pair, without a Python loop"""
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    range_starts = np.cumsum(lengths) - lengths  # where each range begins in the output
+    return np.repeat(starts, lengths) + (np.arange(total) - np.repeat(range_starts, lengths))
+
+
+def _neighbours(offsets, targets, rows):
+    """(index into rows, target) for every edge leaving rows, as two arrays"""
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    return np.repeat(np.arange(len(rows)), lengths), targets[_ranges(starts, lengths)]
+
+
+def _two_hop(offsets, targets, rows):
+    """(index into rows, target) for every path row -> middle -> target (a target reached twice appears twice)"""
+    source, middle = _neighbours(offsets, targets, rows)
+    starts = offsets[middle]
+    lengths = offsets[middle + 1] - starts
+    return np.repeat(source, lengths), targets[_ranges(starts, lengths)]
+
+
+def rebuild_follow_suggestions(top_k=None, category_weight=None):
+    """
+    Recompute every user's top_k follow suggestions. Runs in the caller's transaction; the caller commits.
+    Returns counts and timings for the CLI.
+    """
+    started = time.monotonic()
+    top_k = top_k or current_app.config.get('FOLLOW_SUGGESTIONS_TOP_K', DEFAULT_TOP_K)
+    if category_weight is None:
+        category_weight = current_app.config.get('FOLLOW_SUGGESTIONS_CATEGORY_WEIGHT', DEFAULT_CATEGORY_WEIGHT)
+
+    names = [name for (name,) in db.session.query(User.username).order_by(User.username)]
+    ids = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    # Follow adjacency matrix A (follower -> followee) in CSR form. Names are read back from the user table, so a row
+    # pointing at a missing user is left out and every name is spelled exactly as in ids (MySQL compares them
+    # case-insensitively).
+    Follower, Followee = db.aliased(User), db.aliased(User)
+    edges = (
+        db.session.query(Follower.username, Followee.username)
+        .select_from(Follow)
+        .join(Follower, Follower.username == Follow.follower_username)
+        .join(Followee, Followee.username == Follow.user_username)
+        .all()
+    )
+    src = np.fromiter((ids[follower] for follower, _ in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((ids[followee] for _, followee in edges), dtype=np.int64, count=len(edges))
+    order = np.lexsort((dst, src))
+    src, dst = src[order], dst[order]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=offsets[1:])
+
+    # Category profile of every seller (items posted per category, L2-normalised); sellers are the candidates
+    category_counts = (
+        db.session.query(User.username, db.func.lower(item_category.c.category_name), db.func.count())
+        .join(Item, Item.posted_by == User.username)
+        .join(item_category, item_category.c.item_id == Item.id)
+        .group_by(User.username, db.func.lower(item_category.c.category_name))
+        .all()
+    )
+    categories = sorted({category for _, category, _ in category_counts})
+    category_ids = {category: i for i, category in enumerate(categories)}
+    seller_ids = np.array(sorted({ids[seller] for seller, _, _ in category_counts}), dtype=np.int64)
+    column = np.full(n, -1, dtype=np.int64)  # user id -> seller column (-1: not a seller)
+    column[seller_ids] = np.arange(len(seller_ids))
+    profile = np.zeros((len(seller_ids), len(categories)), dtype=np.float32)
+    for seller, category, count in category_counts:
+        profile[column[ids[seller]], category_ids[category]] = count
+    profile /= np.maximum(np.linalg.norm(profile, axis=1, keepdims=True), 1e-12)
+
+    # Interests of every user: their own profile plus the profiles of the sellers they follow
+    interest = np.zeros((n, len(categories)), dtype=np.float32)
+    interest[seller_ids] += profile
+    followed = column[dst]
+    np.add.at(interest, src[followed >= 0], profile[followed[followed >= 0]])
+    interest /= np.maximum(np.linalg.norm(interest, axis=1, keepdims=True), 1e-12)
+
+    db.session.execute(FollowSuggestion.__table__.delete())
+    stored = 0
+    batch = []
+    k = min(top_k, len(seller_ids))
+    chunk = max(1, CHUNK_CELLS // max(1, len(seller_ids)))
+    for first in range(0, n if k else 0, chunk):
+        rows = np.arange(first, min(n, first + chunk))
+
+        category_score = interest[rows] @ profile.T  # (rows, sellers) cosine similarities
+        mutual = np.zeros_like(category_score)
+        source, target = _two_hop(offsets, dst, rows)  # rows of A @ A, one path at a time
+        keep = column[target] >= 0
+        np.add.at(mutual, (source[keep], column[target[keep]]), 1)
+        score = mutual + category_weight * category_score
+
+        # Never suggest yourself or someone you already follow
+        source, target = _neighbours(offsets, dst, rows)
+        keep = column[target] >= 0
+        score[source[keep], column[target[keep]]] = -1
+        own = column[rows] >= 0
+        score[np.flatnonzero(own), column[rows[own]]] = -1
+
+        # Top k per row: argpartition picks them, then sort those k by score (ties by username)
+        best = np.argpartition(-score, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(score, best, axis=1)
+        order = np.lexsort((best, -best_scores), axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+
+        for i, user_id in enumerate(rows):
+            rank = 0
+            for col in best[i]:
+                if score[i, col] <= 0:
+                    break
+                rank += 1
+                batch.append({
+                    'username': names[user_id],
+                    'rank': rank,
+                    'suggested_username': names[seller_ids[col]],
+                    'score': round(float(score[i, col]), 4),
+                    'mutual_follows': int(mutual[i, col]),
+                    'category_score': round(float(category_score[i, col]), 4),
+                })
+            if len(batch) >= INSERT_BATCH_SIZE:
+                db.session.execute(FollowSuggestion.__table__.insert(), batch)
+                stored += len(batch)
+                batch = []
+    if batch:
+        db.session.execute(FollowSuggestion.__table__.insert(), batch)
+        stored += len(batch)
+
+    bump_version(SUGGESTIONS)
+    return {
+        'users': n,
+        'sellers': len(seller_ids),
+        'follows': len(edges),
+        'suggestions': stored,
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+    }
+
+
+def delete_follow_suggestions(username):
+    """Remove suggestions for and of username (call before deleting the user, because of the foreign keys)"""
+    db.session.execute(FollowSuggestion.__table__.delete().where(
+        (FollowSuggestion.username == username) | (FollowSuggestion.suggested_username == username)
+    ))
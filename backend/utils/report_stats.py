@@ -0,0 +1,309 @@
+from itertools import groupby
+from sqlalchemy.dialects import mysql, sqlite
+from models import db, User, Item, Review, Follow, UserStats, UserDailyPosts, UserDayCategory, item_category
+from utils.streaming import STREAM_BATCH_SIZE
+
+# Incremental maintenance of the reporting summary tables (user_stats, user_daily_posts, user_day_category).
+# user_stats also carries each user's follower / following counts, so profile headers never count the follow table.
+# The write paths call these helpers in the same transaction as the write itself, so the summaries never drift
+# from the raw tables, and the reports in routes/reports.py become indexed lookups instead of full recomputes.
+# rebuild_report_stats() recomputes everything from item/review/user (after bulk imports, or to repair drift).
+"""
+-- e.g. record_item_posted (MySQL; SQLite uses ON CONFLICT (...) DO UPDATE)
+INSERT INTO user_stats (username, items_posted) VALUES (:username, 1)
+ON DUPLICATE KEY UPDATE items_posted = items_posted + 1;
+
+INSERT INTO user_daily_posts (username, day, post_count) VALUES (:username, :day, 1)
+ON DUPLICATE KEY UPDATE post_count = post_count + 1;
+
+-- record_follows (a bulk follow of :n users)
+INSERT INTO user_stats (username, following) VALUES (:follower, :n)
+ON DUPLICATE KEY UPDATE following = following + :n;
+INSERT INTO user_stats (username, followers) VALUES (:followee_1, 1), (:followee_2, 1), ...
+ON DUPLICATE KEY UPDATE followers = followers + 1;
+"""
+
+STAT_COLUMNS = ('items_posted', 'reviews_written', 'poor_reviews_written', 'poor_reviews_received', 'followers', 'following')
+
+
+def _increment(model, keys, increments):
+    """
+    INSERT the row with the increments as starting values, or add them to the existing row, in one statement.
+    keys is one row's primary key values, or a list of them to apply the same increments to many rows at once.
+    """
+    table = model.__table__
+    key_rows = keys if isinstance(keys, list) else [keys]
+    if not key_rows:
+        return
+    values = [dict(key, **increments) for key in key_rows]
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql.insert(table).values(values)
+        stmt = stmt.on_duplicate_key_update({col: table.c[col] + amount for col, amount in increments.items()})
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_rows[0]),
+            set_={col: table.c[col] + amount for col, amount in increments.items()}
+        )
+    else:
+        for key, row in zip(key_rows, values):
+            result = db.session.execute(
+                table.update()
+                .where(*(table.c[k] == v for k, v in key.items()))
+                .values({col: table.c[col] + amount for col, amount in increments.items()})
+            )
+            if not result.rowcount:
+                db.session.execute(table.insert().values(row))
+        return
+    db.session.execute(stmt)
+
+
+def ensure_user_stats(username):
+    """Give a new user their (all zero) stats row, so 'never posted' is an indexed lookup"""
+    _increment(UserStats, {'username': username}, {col: 0 for col in STAT_COLUMNS})
+
+
+def delete_user_stats(username):
+    """Remove a user's summary rows (call before deleting the user, because of the foreign keys)"""
+    db.session.execute(UserDailyPosts.__table__.delete().where(UserDailyPosts.username == username))
+    db.session.execute(UserDayCategory.__table__.delete().where(UserDayCategory.username == username))
+    db.session.execute(UserStats.__table__.delete().where(UserStats.username == username))
+
+
+def record_item_posted(username, day):
+    _increment(UserStats, {'username': username}, {'items_posted': 1})
+    _increment(UserDailyPosts, {'username': username, 'day': day}, {'post_count': 1})
+
+
+def record_item_categories(item_id, username, day, category_names):
+    """Add a new item to the user_day_category index (one multi-row INSERT)"""
+    if category_names:
+        db.session.execute(UserDayCategory.__table__.insert(), [
+            {'category_name': name.lower(), 'username': username, 'day': day, 'item_id': item_id}
+            for name in sorted(set(category_names))
+        ])
+
+
+def record_follows(follower, followees, delta=1):
+    """follower started (delta=1) or stopped (delta=-1) following every user in followees: two statements in all"""
+    followees = sorted(set(followees))
+    if followees:
+        _increment(UserStats, {'username': follower}, {'following': delta * len(followees)})
+        _increment(UserStats, [{'username': name} for name in followees], {'followers': delta})
+
+
+def follow_counts(username):
+    """{'followers': n, 'following': m} for username (one primary key lookup; zeros if they have no stats row)"""
+    row = db.session.query(UserStats.followers, UserStats.following).filter(UserStats.username == username).first()
+    return {'followers': row.followers if row else 0, 'following': row.following if row else 0}
+
+
+def record_review(reviewer, item_owner, score):
+    is_poor = 1 if score == 'Poor' else 0
+    _increment(UserStats, {'username': reviewer}, {'reviews_written': 1, 'poor_reviews_written': is_poor})
+    if is_poor:
+        _increment(UserStats, {'username': item_owner}, {'poor_reviews_received': 1})
+
+
+def rebuild_report_stats():
+    """
+    Recompute the summary tables from the raw tables with set-based statements:
+        DELETE FROM user_day_category; DELETE FROM user_daily_posts; DELETE FROM user_stats;
+        INSERT INTO user_stats SELECT u.username, (SELECT COUNT(*) FROM item WHERE posted_by = u.username), ...,
+            (SELECT COUNT(*) FROM follow WHERE user_username = u.username), ... FROM user u;
+        INSERT INTO user_daily_posts SELECT posted_by, date_posted, COUNT(*) FROM item GROUP BY posted_by, date_posted;
+        INSERT INTO user_day_category SELECT DISTINCT LOWER(ic.category_name), i.posted_by, i.date_posted, i.id
+            FROM item_category ic JOIN item i ON i.id = ic.item_id;
+    Runs in the caller's transaction; the caller commits.
+    """
+    db.session.execute(UserDayCategory.__table__.delete())
+    db.session.execute(UserDailyPosts.__table__.delete())
+    db.session.execute(UserStats.__table__.delete())
+
+    def count(model, *conditions):
+        return db.select(db.func.count()).select_from(model).where(*conditions).scalar_subquery()
+
+    PosterItem = db.aliased(Item)
+    stats = db.select(
+        User.username,
+        count(Item, Item.posted_by == User.username),
+        count(Review, Review.user_id == User.username),
+        count(Review, Review.user_id == User.username, Review.score == 'Poor'),
+        db.select(db.func.count()).select_from(Review)
+        .join(PosterItem, PosterItem.id == Review.item_id)
+        .where(PosterItem.posted_by == User.username, Review.score == 'Poor')
+        .scalar_subquery(),
+        count(Follow, Follow.user_username == User.username),
+        count(Follow, Follow.follower_username == User.username),
+    )
+    db.session.execute(
+        UserStats.__table__.insert().from_select(['username', *STAT_COLUMNS], stats)
+    )
+
+    daily = db.select(Item.posted_by, Item.date_posted, db.func.count()).group_by(Item.posted_by, Item.date_posted)
+    db.session.execute(
+        UserDailyPosts.__table__.insert().from_select(['username', 'day', 'post_count'], daily)
+    )
+
+    by_category = (
+        db.select(db.func.lower(item_category.c.category_name), Item.posted_by, Item.date_posted, Item.id)
+        .join(Item, Item.id == item_category.c.item_id)
+        .distinct()
+    )
+    db.session.execute(
+        UserDayCategory.__table__.insert().from_select(['category_name', 'username', 'day', 'item_id'], by_category)
+    )
+
+
+def users_posting_categories_same_day(categories):
+    """Sorted list of the users iter_users_posting_categories_same_day() finds"""
+    return list(iter_users_posting_categories_same_day(categories))
+
+
+def iter_users_posting_categories_same_day(categories):
+    """
+    Yield, in username order, the users who on the same day posted len(categories) different items with one item
+    in each of the given categories (a category listed twice needs two items in it). The database narrows things
+    down to the (user, day) pairs that touched every category; we then check that distinct items can cover them.
+    Rows come back grouped by (user, day) from a server-side cursor, so only one group is in memory at a time.
+
+    SELECT d.username, d.day, d.category_name, d.item_id
+    FROM user_day_category d
+    JOIN (SELECT username, day FROM user_day_category
+          WHERE category_name IN (:categories)
+          GROUP BY username, day
+          HAVING COUNT(DISTINCT category_name) = :distinct_categories) c
+      ON c.username = d.username AND c.day = d.day
+    WHERE d.category_name IN (:categories)
+    ORDER BY d.username, d.day;
+    """
+    slots = [name.lower() for name in categories]
+    wanted = sorted(set(slots))
+    covering = (
+        db.select(UserDayCategory.username, UserDayCategory.day)
+        .where(UserDayCategory.category_name.in_(wanted))
+        .group_by(UserDayCategory.username, UserDayCategory.day)
+        .having(db.func.count(db.distinct(UserDayCategory.category_name)) == len(wanted))
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(UserDayCategory.username, UserDayCategory.day, UserDayCategory.category_name, UserDayCategory.item_id)
+        .join(covering, (covering.c.username == UserDayCategory.username) & (covering.c.day == UserDayCategory.day))
+        .where(UserDayCategory.category_name.in_(wanted))
+        .order_by(UserDayCategory.username, UserDayCategory.day)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+
+    found = None  # last user yielded; their other days don't need checking
+    for (username, day), group in groupby(rows, key=lambda row: (row.username, row.day)):
+        if username == found:
+            continue
+        items_by_category = {}  # category -> {item ids}
+        for row in group:
+            items_by_category.setdefault(row.category_name, set()).add(row.item_id)
+        if _distinct_items_cover(slots, items_by_category):
+            found = username
+            yield username
+
+
+def _distinct_items_cover(slots, items_by_category):
+    """
+    True if every slot (a category) can be given its own item from items_by_category, i.e. a bipartite matching
+    of slots to items saturates the slots (augmenting paths; there are only a handful of slots).
+    """
+    owner = {}  # item id -> slot it is assigned to
+
+    def assign(slot, seen):
+        for item_id in items_by_category.get(slots[slot], ()):
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            if item_id not in owner or assign(owner[item_id], seen):
+                owner[item_id] = slot
+                return True
+        return False
+
+    return all(assign(slot, set()) for slot in range(len(slots)))
+
+
+LEADERBOARD_BUCKETS = ('day', 'week', 'month')
+
+
+def date_bucket(column, bucket):
+    """
+    SQL expression for the first day of the bucket a DATE column falls in (weeks start on Monday):
+        MySQL:  SUBDATE(day, WEEKDAY(day))                                     DATE_FORMAT(day, '%Y-%m-01')
+        SQLite: DATE(day, '-' || ((STRFTIME('%w', day) + 6) % 7) || ' days')   STRFTIME('%Y-%m-01', day)
+    Only applied to the already-filtered rows, so the range predicate on the column itself stays sargable.
+    """
+    if bucket == 'day':
+        return column
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        if bucket == 'week':
+            return db.func.subdate(column, db.func.weekday(column))
+        return db.func.date_format(column, '%Y-%m-01')
+    if dialect == 'sqlite':
+        if bucket == 'week':
+            days_since_monday = (db.func.strftime('%w', column) + 6) % 7
+            return db.func.date(column, '-' + db.cast(days_since_monday, db.String) + ' days')
+        return db.func.strftime('%Y-%m-01', column)
+    return db.func.date_trunc(bucket, column)  # PostgreSQL
+
+
+def posting_leaderboard(start, end, bucket='day', top_n=1):
+    """
+    Top posters for every day/week/month bucket between start and end (inclusive dates), grouped by bucket:
+    [{'start': 'YYYY-MM-DD', 'leaders': [{'username', 'posts', 'rank'}, ...]}, ...] oldest first.
+    """
+    buckets = []
+    for row in iter_posting_leaderboard(start, end, bucket, top_n):
+        if not buckets or buckets[-1]['start'] != row['start']:
+            buckets.append({'start': row['start'], 'leaders': []})
+        buckets[-1]['leaders'].append({'username': row['username'], 'posts': row['posts'], 'rank': row['rank']})
+    return buckets
+
+
+def iter_posting_leaderboard(start, end, bucket='day', top_n=1):
+    """
+    Yield {'start', 'username', 'posts', 'rank'} for the top posters of every day/week/month bucket between start
+    and end (inclusive dates), read from the per-(user, day) counts in user_daily_posts, oldest bucket first.
+    Ties share a rank (RANK()), so a bucket can have more than top_n users.
+
+    SELECT bucket, username, posts, rnk FROM (
+      SELECT <bucket(day)> AS bucket, username, SUM(post_count) AS posts,
+             RANK() OVER (PARTITION BY <bucket(day)> ORDER BY SUM(post_count) DESC) AS rnk
+      FROM user_daily_posts
+      WHERE day >= :start AND day <= :end AND post_count > 0     -- range scan on ix_user_daily_posts_day_count
+      GROUP BY bucket, username
+    ) ranked
+    WHERE rnk <= :top_n
+    ORDER BY bucket, rnk, username;
+    """
+    bucket_expr = date_bucket(UserDailyPosts.day, bucket).label('bucket')
+    posts = db.func.sum(UserDailyPosts.post_count)
+    ranked = (
+        db.select(
+            bucket_expr,
+            UserDailyPosts.username,
+            posts.label('posts'),
+            db.func.rank().over(partition_by=bucket_expr, order_by=posts.desc()).label('rnk'),
+        )
+        .where(UserDailyPosts.day >= start, UserDailyPosts.day <= end, UserDailyPosts.post_count > 0)
+        .group_by(bucket_expr, UserDailyPosts.username)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(ranked)
+        .where(ranked.c.rnk <= top_n)
+        .order_by(ranked.c.bucket, ranked.c.rnk, ranked.c.username)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    for row in rows:
+        yield {
+            'start': row.bucket.isoformat() if hasattr(row.bucket, 'isoformat') else str(row.bucket)[:10],
+            'username': row.username,
+            'posts': int(row.posts),
+            'rank': row.rnk,
+        }
@@ -0,0 +1,92 @@
+import re
+from sqlalchemy import column, exists, func, literal_column, or_, table
+from sqlalchemy.dialects.mysql import match
+from models import db, Item, item_category
+
+# Keyword search over item.title and item.description, ranked by relevance.
+# The text index itself is created next to the item table in models.py (ITEM_SEARCH_DDL):
+#   MySQL  -> FULLTEXT index, queried with MATCH ... AGAINST (natural language mode)
+#   SQLite -> FTS5 table kept in sync by triggers, ranked with bm25() (used for local testing)
+"""
+-- MySQL
+SELECT item.*, MATCH (title, description) AGAINST (:q IN NATURAL LANGUAGE MODE) AS relevance
+FROM item
+WHERE MATCH (title, description) AGAINST (:q IN NATURAL LANGUAGE MODE)
+  AND EXISTS (SELECT 1 FROM item_category WHERE item_id = item.id AND category_name IN (:categories))  -- optional
+ORDER BY relevance DESC, item.id DESC
+LIMIT :limit_plus_one OFFSET :offset;
+
+-- SQLite
+SELECT item.*, -bm25(item_fts) AS relevance
+FROM item JOIN item_fts ON item_fts.rowid = item.id
+WHERE item_fts MATCH :fts_terms
+ORDER BY relevance DESC, item.id DESC
+LIMIT :limit_plus_one OFFSET :offset;
+"""
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Lightweight handle on the SQLite FTS5 table (not part of db.metadata, so create_all() won't try to create it)
+item_fts_table = table('item_fts', column('rowid'))
+
+
+def tokenize(q):
+    """Split a search string into lowercase words (punctuation is dropped so it can't be read as query syntax)"""
+    return [t.lower() for t in TOKEN_RE.findall(q or '')]
+
+
+def keyword_search_query(q, categories=None):
+    """
+    Build a query of (Item, relevance) rows matching the words in q, best match first.
+    categories (optional) limits results to items in at least one of the given categories.
+    Returns None if q has no searchable words.
+    """
+    terms = tokenize(q)
+    if not terms:
+        return None
+
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        relevance = match(Item.title, Item.description, against=' '.join(terms))
+        query = db.session.query(Item, relevance.label('relevance')).filter(relevance > 0)
+    elif dialect == 'sqlite':
+        # Quote every word so FTS5 treats it as a plain term, then OR them together (any word can match)
+        fts_terms = ' OR '.join(f'"{t}"' for t in terms)
+        item_fts = literal_column('item_fts')
+        relevance = -func.bm25(item_fts)  # bm25() is "lower is better", flip it so bigger means more relevant
+        query = (
+            db.session.query(Item, relevance.label('relevance'))
+            .join(item_fts_table, item_fts_table.c.rowid == Item.id)
+            .filter(item_fts.op('MATCH')(fts_terms))
+        )
+    else:
+        # No text index for this database: fall back to LIKE matching (unranked, newest first)
+        relevance = literal_column('0')
+        query = db.session.query(Item, relevance.label('relevance')).filter(or_(*(
+            or_(Item.title.ilike(f'%{t}%'), Item.description.ilike(f'%{t}%')) for t in terms
+        )))
+
+    if categories:
+        query = query.filter(category_filter(categories))
+
+    return query.order_by(relevance.desc(), Item.id.desc())
+
+
+def category_filter(categories, match_all=False):
+    """
+    WHERE clause limiting items to the given categories.
+      match_all=False -> item is in ANY of them:  EXISTS (SELECT 1 FROM item_category WHERE item_id = item.id AND category_name IN (...))
+      match_all=True  -> item is in ALL of them:  item.id IN (SELECT item_id ... GROUP BY item_id HAVING COUNT(*) = :n)
+    """
+    if match_all:
+        items_with_all = (
+            db.session.query(item_category.c.item_id)
+            .filter(item_category.c.category_name.in_(categories))
+            .group_by(item_category.c.item_id)
+            .having(func.count() == len(set(categories)))
+        )
+        return Item.id.in_(items_with_all)
+    return exists().where(
+        item_category.c.item_id == Item.id,
+        item_category.c.category_name.in_(categories)
+    )
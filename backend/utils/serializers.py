@@ -0,0 +1,66 @@
+from models import db, item_category, resolve_item_image_url
+from utils.categories import category_registry
+
+# Shared item -> JSON serialization for every endpoint that returns items.
+# Looping over items and touching item.categories / item.reviews.count() / item.get_image_url() issues 2-3
+# queries per item (the classic N+1 problem). serialize_items() instead loads categories for the whole batch
+# with one query, so a request costs the same number of queries for 1 item or 1,000. Review counts and the
+# score histogram are maintained on the item row itself, so serializing never touches the review table, and
+# category icons come from the in-process category registry instead of a join on the category table.
+"""
+SELECT item_id, category_name
+FROM item_category
+WHERE item_id IN (:item_ids);
+"""
+
+
+def fetch_categories_map(item_ids):
+    """{item_id: [{'name', 'icon_key'}, ...]} for every item in item_ids, in one query"""
+    if not item_ids:
+        return {}
+    cat_rows = (
+        db.session.query(item_category.c.item_id, item_category.c.category_name)
+        .filter(item_category.c.item_id.in_(item_ids))
+        .all()
+    )
+    icons = category_registry.resolve({name for _, name in cat_rows})
+    categories_map = {}
+    for item_id, name in cat_rows:
+        categories_map.setdefault(item_id, []).append({'name': name, 'icon_key': icons.get(name)})
+    return categories_map
+
+
+def serialize_items(items):
+    """Serialize a list of Item objects (or an Item query, which is run here) into the JSON shape the frontend uses"""
+    if hasattr(items, 'all'):
+        items = items.all()
+    if not items:
+        return []
+
+    item_ids = [item.id for item in items]
+    categories_map = fetch_categories_map(item_ids)
+
+    # Build results without per-item queries
+    result = []
+    for item in items:
+        cats = categories_map.get(item.id, [])
+        result.append({
+            'id': item.id,
+            'title': item.title,
+            'description': item.description,
+            'price': str(item.price),
+            'posted_by': item.posted_by,
+            'date_posted': item.date_posted.isoformat(),
+            'categories': cats,
+            'star_rating': item.star_rating,
+            'review_count': item.review_count,
+            'review_histogram': item.review_histogram(),
+            # Compute the image URL from the batch-loaded categories instead of item.get_image_url()
+            'image_url': resolve_item_image_url(item.image_url, cats[0]['icon_key'] if cats else None)
+        })
+    return result
+
+
+def serialize_item(item):
+    """Serialize a single Item (same shape as serialize_items)"""
+    return serialize_items([item])[0]
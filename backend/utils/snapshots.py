@@ -0,0 +1,27 @@
+import threading
+from utils.conditional import current_version
+
+# Snapshots of expensive report results, kept in memory until the data they depend on changes.
+# Each snapshot remembers the data_version of its scope (see utils/conditional.py) at the time it was computed.
+# Serving it only costs that one version lookup; when a write path has bumped the version since (in any worker
+# process), the snapshot is recomputed on the next request.
+
+
+class VersionedSnapshot:
+
+    def __init__(self, scope):
+        self.scope = scope
+        self._snapshots = {}  # key (e.g. report params) -> (version, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Return the snapshot for key, calling compute() to rebuild it if the scope's version has moved on"""
+        version = current_version(self.scope)
+        with self._lock:
+            cached = self._snapshots.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = compute()
+        with self._lock:
+            self._snapshots[key] = (version, value)
+        return value
@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+from flask import Response, stream_with_context
+
+# Streaming responses for large report results.
+# Rows are pulled from a server-side cursor (Query.yield_per) and written to the client as they arrive, so memory
+# stays flat however many rows there are, and the first bytes go out before the query has finished.
+
+STREAM_BATCH_SIZE = 500
+
+# ?format= values the reports accept: json is the regular response, csv/ndjson are streamed downloads
+EXPORT_FORMATS = ('json', 'csv', 'ndjson')
+
+
+def stream_json_list(key, rows, serialize):
+    """
+    Stream {"<key>": [serialize(row), ...]} as a JSON document.
+    rows is any iterable (normally query.yield_per(STREAM_BATCH_SIZE)); serialize turns one row into a dict.
+    """
+    def generate():
+        yield '{"%s": [' % key
+        first = True
+        for row in rows:
+            yield ('' if first else ',') + json.dumps(serialize(row), default=str)
+            first = False
+        yield ']}'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def stream_export(fmt, name, columns, rows, serialize=None):
+    """
+    Stream rows as a <name>.csv (header row, then one line per row) or <name>.ndjson (one JSON object per line)
+    download. serialize turns one row into a dict keyed by columns; by default rows are tuples/Rows in column order.
+    """
+    if serialize is None:
+        serialize = lambda row: dict(zip(columns, row))
+
+    if fmt == 'csv':
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for i, row in enumerate(rows, start=1):
+                writer.writerow(serialize(row))
+                if i % STREAM_BATCH_SIZE == 0:  # send a chunk per batch instead of one tiny write per row
+                    yield _drain(buffer)
+            yield _drain(buffer)
+        mimetype = 'text/csv'
+    else:
+        def generate():
+            lines = []
+            for row in rows:
+                lines.append(json.dumps(serialize(row), default=str) + '\n')
+                if len(lines) == STREAM_BATCH_SIZE:
+                    yield ''.join(lines)
+                    lines = []
+            yield ''.join(lines)
+        mimetype = 'application/x-ndjson'
+
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
+
+
+def _drain(buffer):
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
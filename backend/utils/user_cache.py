@@ -0,0 +1,74 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, User
+from utils.cache import LRUCache, response_cache
+
+# Per-process cache for Flask-Login's user_loader, which otherwise runs SELECT ... FROM user WHERE username = ?
+# before every authenticated request (even /api/users/me and /api/auth/status).
+# We cache the row's column values, not the User object: an ORM instance belongs to the session of the request that
+# loaded it. On a hit the values are rebuilt into a detached User and merged into the current session with
+# load=False, which attaches it without any SQL, so routes can still modify current_user and commit.
+# Entries are tagged 'user:<username>' like the response cache, and update_user / update_profile / update_my_avatar /
+# delete_user drop that tag from every cache with invalidate_user() after they commit. Other worker processes only see such a change once their entry
+# expires, so USER_CACHE_TTL bounds how long a stale profile (or a deleted account) can be served.
+"""
+SELECT username, password, firstName, lastName, email, profile_image_url FROM user WHERE username = :username;  -- misses only
+"""
+
+_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+
+class UserCache(LRUCache):
+    """LRUCache of user rows for load_user, configured from app.config like our other extensions"""
+
+    enabled = True
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.enabled = app.config.get('USER_CACHE_ENABLED', True)
+
+    def load(self, username):
+        """The User for username attached to the current session (None if there is no such user)"""
+        if not self.enabled:
+            return db.session.get(User, username)
+
+        values = self.get(username)
+        if values is None:
+            user = db.session.get(User, username)
+            if user is not None:
+                self.set(username, {col: getattr(user, col) for col in _COLUMNS}, tags=[f'user:{username}'])
+            return user
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+user_cache = UserCache(max_entries=1024, ttl=60)
+
+
+class ProfileCache(LRUCache):
+    """
+    Public profile fields served by GET|POST /api/users/profiles, one entry per username.
+    Kept apart from the response cache so a batch of a few hundred usernames can't evict its cached item and category
+    responses or skew its hit/miss counters. Entries carry the same 'user:<username>' tag as user_cache.
+    """
+
+    enabled = True
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('USER_PROFILE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('USER_PROFILE_CACHE_TTL', self.ttl)
+        self.enabled = app.config.get('USER_PROFILE_CACHE_ENABLED', True)
+
+
+profile_cache = ProfileCache(max_entries=4096, ttl=30)
+
+
+def invalidate_user(username):
+    """Drop everything this process caches about username (call after committing a change to their user row)"""
+    tag = f'user:{username}'
+    response_cache.invalidate(tag)
+    user_cache.invalidate(tag)
+    profile_cache.invalidate(tag)